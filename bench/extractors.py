@@ -0,0 +1,72 @@
+"""Micro-benchmark of ContentFetcher's HTML extraction backends.
+
+Usage:
+    python bench/extractors.py --corpus path/to/saved/pages [--repeat 5]
+
+The corpus is a directory of saved pages (*.html). Without one, a synthetic
+corpus of article-like pages is generated so the backends can still be compared.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from transformers.extractors import EXTRACTORS, get_extractor
+
+def synthetic_corpus(pages: int = 20):
+    """Article-like pages with navigation, scripts and a few hundred paragraphs"""
+    corpus = []
+    for page in range(pages):
+        paragraphs = ''.join(
+            f'<p>Paragraph {i} of page {page} with <a href="/link/{i}">a link</a> and some <b>inline</b> text.</p>'
+            for i in range(50 + page * 20)
+        )
+        corpus.append((f"synthetic-{page}.html", (
+            '<html><head><title>Page</title><style>p { margin: 0 }</style></head><body>'
+            '<nav><a href="/">Home</a><a href="/about">About</a></nav>'
+            f'<h1>Article {page}</h1>{paragraphs}<script>var tracking = 1;</script></body></html>'
+        ).encode('utf-8')))
+    return corpus
+
+def load_corpus(path: str):
+    return [(page.name, page.read_bytes()) for page in sorted(Path(path).glob('*.htm*'))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare HTML extraction backends')
+    parser.add_argument('--corpus', type=str, help='Directory of saved *.html pages')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over the corpus per backend')
+    parser.add_argument('--backends', type=str, default=','.join(EXTRACTORS), help='Comma-separated backends')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not corpus:
+        sys.exit(f"No pages found in {args.corpus}")
+    total_bytes = sum(len(body) for _, body in corpus)
+    print(f"Corpus: {len(corpus)} pages, {total_bytes / 1024 / 1024:.2f} MB, {args.repeat} passes\n")
+    print(f"{'backend':<12} {'ms/page':>10} {'MB/s':>8} {'chars':>10} {'links':>8}")
+
+    for name in args.backends.split(','):
+        try:
+            extract = get_extractor(name)
+        except ImportError as e:
+            print(f"{name:<12} skipped ({e})")
+            continue
+
+        chars = links = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for page_name, body in corpus:
+                text, page_links = extract(body, f"https://example.com/{page_name}", None)
+                chars += len(text)
+                links += len(page_links)
+        elapsed = time.perf_counter() - start
+
+        pages = len(corpus) * args.repeat
+        print(f"{name:<12} {elapsed / pages * 1000:>10.2f} {total_bytes * args.repeat / elapsed / 1024 / 1024:>8.2f} "
+              f"{chars // args.repeat:>10} {links // args.repeat:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""Local stand-ins for the services a hackerman run talks to.
+
+Each service is a ThreadingHTTPServer on its own port:
+
+- HNService: Firebase-shaped Hacker News API (beststories, maxitem, updates, item/<id>)
+- ArticleService: article pages with ETag/Last-Modified validators
+- OpenAIService: OpenAI-compatible /v1/chat/completions with latency and 429 injection
+- ElasticsearchService: enough of the index, _bulk and _mget APIs for ArticleWriter
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+# Comment ids live above this offset so they never collide with story ids
+COMMENT_ID_OFFSET = 10_000_000
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _dispatch(self):
+        status, headers, body = self.server.service.handle(self.command, self.path, self.headers, self._body())
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_HEAD = do_DELETE = _dispatch
+
+class Service(ABC):
+    """Base class: serve `handle()` on a background thread"""
+
+    def __init__(self, host: str = '127.0.0.1'):
+        self.host = host
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.service = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    def start(self) -> 'Service':
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @abstractmethod
+    def handle(self, method: str, path: str, headers, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Answer one request with (status, headers, body)"""
+        pass
+
+def _json(payload: Any, status: int = 200, headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {'Content-Type': 'application/json', **(headers or {})}, json.dumps(payload).encode('utf-8')
+
+class HNService(Service):
+    def __init__(self, stories: int, article_url: str, comments_per_story: int = 10, reply_depth: int = 1):
+        super().__init__()
+        self.stories = stories
+        self.article_url = article_url
+        self.comments_per_story = comments_per_story
+        self.reply_depth = reply_depth
+        self.started = int(time.time())
+
+    def _comment_id(self, story_id: int, index: int, depth: int) -> int:
+        return COMMENT_ID_OFFSET + (story_id * 1000 + depth * 100 + index)
+
+    def item(self, item_id: int) -> Dict[str, Any]:
+        if item_id >= COMMENT_ID_OFFSET:
+            story_id, rest = divmod(item_id - COMMENT_ID_OFFSET, 1000)
+            depth, index = divmod(rest, 100)
+            kids = [self._comment_id(story_id, index, depth + 1)] if depth < self.reply_depth else []
+            return {'id': item_id, 'type': 'comment', 'by': f"user{index}", 'parent': story_id,
+                    'text': f"Comment {index} at depth {depth} on story {story_id}. " * 4,
+                    'time': self.started - index, 'kids': kids}
+        return {'id': item_id, 'type': 'story', 'by': f"author{item_id % 97}",
+                'title': f"Benchmark story {item_id} about distributed systems",
+                'url': f"{self.article_url}/articles/{item_id}.html",
+                'score': 1000 - item_id % 1000, 'descendants': self.comments_per_story,
+                'time': self.started - (self.stories - item_id) * 60,
+                'kids': [self._comment_id(item_id, index, 0) for index in range(self.comments_per_story)]}
+
+    def handle(self, method, path, headers, body):
+        path = path.split('?')[0]
+        if path in ('/v0/beststories.json', '/v0/topstories.json'):
+            return _json(list(range(1, self.stories + 1)))
+        if path == '/v0/maxitem.json':
+            return _json(self.stories)
+        if path == '/v0/updates.json':
+            return _json({'items': [], 'profiles': []})
+        match = re.match(r'/v0/item/(\d+)\.json$', path)
+        if match:
+            return _json(self.item(int(match.group(1))))
+        return _json(None, status=404)
+
+class ArticleService(Service):
+    def __init__(self, paragraphs: int = 40):
+        # A different hostname keeps per-host limits for articles apart from the HN API
+        super().__init__(host='localhost')
+        self.paragraphs = paragraphs
+
+    def handle(self, method, path, headers, body):
+        match = re.match(r'/articles/(\d+)\.html', path)
+        if not match:
+            return 404, {'Content-Type': 'text/plain'}, b'not found'
+        story_id = match.group(1)
+        etag = '"' + hashlib.md5(story_id.encode()).hexdigest() + '"'
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        paragraphs = ''.join(
+            f"<p>Paragraph {i} of article {story_id} discusses <a href='/ref/{i}'>consensus</a>, "
+            f"replication and the trade-offs of distributed systems in some detail.</p>"
+            for i in range(self.paragraphs)
+        )
+        html = (f"<html><head><title>Article {story_id}</title><script>var x = 1;</script></head>"
+                f"<body><nav><a href='/'>Home</a></nav><h1>Article {story_id}</h1>{paragraphs}</body></html>")
+        return 200, {'Content-Type': 'text/html; charset=utf-8', 'ETag': etag}, html.encode('utf-8')
+
+class OpenAIService(Service):
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, throttle_rate: float = 0.0,
+                 retry_after: float = 0.5):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def _reply(self, prompt: str) -> str:
+        """Answer in whatever shape the calling transformer's prompt asks for"""
+        if '"summaries"' in prompt:
+            indexes = [int(index) for index in re.findall(r'^\[(\d+)\] ', prompt, re.MULTILINE)]
+            return json.dumps({'summaries': [{'index': i, 'summary': f"Comment {i} summary."} for i in indexes]})
+        if '"summary"' in prompt:
+            return json.dumps({'summary': "A benchmark article summary.",
+                               'tags': [{'name': 'databases', 'score': 0.9}]})
+        if 'assign relevant tags' in prompt:
+            return json.dumps([{'name': 'databases', 'score': 0.9}])
+        return "A benchmark summary in two sentences. It is not very informative."
+
+    def handle(self, method, path, headers, body):
+        if not path.endswith('/chat/completions'):
+            return _json({'error': {'message': 'not found'}}, status=404)
+        with self.lock:
+            self.requests += 1
+            throttle = random.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+        if throttle:
+            return _json({'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                         status=429, headers={'Retry-After': str(self.retry_after)})
+
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        request = json.loads(body or b'{}')
+        prompt = ''.join(message.get('content', '') for message in request.get('messages', []))
+        content = self._reply(prompt)
+        prompt_tokens, completion_tokens = len(prompt) // 4 + 1, len(content) // 4 + 1
+        return _json({
+            'id': f"chatcmpl-bench-{self.requests}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-3.5-turbo'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        })
+
+class ElasticsearchService(Service):
+    PRODUCT_HEADERS = {'X-Elastic-Product': 'Elasticsearch'}
+
+    def __init__(self):
+        super().__init__()
+        self.indices: Dict[str, Dict[str, Any]] = {}
+        self.docs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.bulk_requests = 0
+        self.lock = threading.Lock()
+
+    def _es(self, payload: Any, status: int = 200):
+        return _json(payload, status=status, headers=self.PRODUCT_HEADERS)
+
+    def _bulk(self, default_index: str, body: bytes):
+        lines = [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = []
+        with self.lock:
+            self.bulk_requests += 1
+            for action_line, source in zip(lines[0::2], lines[1::2]):
+                op, meta = next(iter(action_line.items()))
+                index = meta.get('_index', default_index)
+                docs = self.docs.setdefault(index, {})
+                doc_id = str(meta.get('_id'))
+                if op == 'update':
+                    if doc_id not in docs and not source.get('doc_as_upsert'):
+                        items.append({op: {'_index': index, '_id': doc_id, 'status': 404,
+                                           'error': {'type': 'document_missing_exception'}}})
+                        continue
+                    docs.setdefault(doc_id, {}).update(source.get('doc', {}))
+                else:
+                    docs[doc_id] = source
+                items.append({op: {'_index': index, '_id': doc_id, 'status': 200, 'result': 'updated'}})
+        return self._es({'took': 1, 'errors': False, 'items': items})
+
+    def handle(self, method, path, headers, body):
+        path = path.split('?')[0].rstrip('/')
+        parts = [part for part in path.split('/') if part]
+        if not parts:
+            return self._es({'name': 'bench', 'cluster_name': 'bench',
+                             'version': {'number': '8.17.0', 'build_flavor': 'default'},
+                             'tagline': 'You Know, for Search'})
+        if parts[-1] == '_bulk':
+            return self._bulk(parts[0] if len(parts) > 1 else None, body)
+        index = parts[0]
+        if len(parts) == 1:
+            if method == 'HEAD':
+                return self._es({}, status=200 if index in self.indices else 404)
+            if method == 'PUT':
+                self.indices[index] = {'refresh_interval': None}
+                self.docs.setdefault(index, {})
+                return self._es({'acknowledged': True, 'index': index})
+        if parts[1:] == ['_settings']:
+            if method == 'GET':
+                settings = {key: value for key, value in self.indices.get(index, {}).items() if value is not None}
+                return self._es({index: {'settings': {'index': {'number_of_shards': '1', **settings}}}})
+            update = json.loads(body or b'{}')
+            self.indices.setdefault(index, {}).update(update.get('index', update))
+            return self._es({'acknowledged': True})
+        if parts[1:] == ['_mget']:
+            ids = json.loads(body or b'{}').get('ids', [])
+            docs = self.docs.get(index, {})
+            return self._es({'docs': [
+                {'_index': index, '_id': i, 'found': True, '_source': docs[i]} if i in docs
+                else {'_index': index, '_id': i, 'found': False}
+                for i in ids
+            ]})
+        # _mapping, _refresh and anything else just succeeds
+        return self._es({'acknowledged': True, '_shards': {'total': 1, 'successful': 1, 'failed': 0}})
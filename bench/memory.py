@@ -0,0 +1,119 @@
+"""Memory benchmark for story records at backfill scale.
+
+Builds the same synthetic stories twice: as the plain dicts the pipeline
+used to pass around, and as Story records with authors and tag names
+interned the way HackerNewsSource and the taggers do. Link URLs are
+mostly unique and are not interned. Reports the memory held per story (tracemalloc), the time to
+build them and the cost of a mapping-style `get` pass through the adapter.
+
+Content, links and comments dominate and are stored the same way in both,
+so expect only a small difference: Story records exist for typed access,
+not to save memory.
+
+Usage:
+    python bench/memory.py
+    python bench/memory.py --stories 100000 --content-chars 4000 --json memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from story import Story
+
+TAG_NAMES = ['ai', 'programming', 'security', 'startups', 'science', 'hardware', 'web', 'databases']
+
+def raw_story(i: int, args, rng: random.Random) -> Dict[str, Any]:
+    """One story's fields, as fresh strings the way JSON decoding and parsing produce them"""
+    # Build strings at runtime so equal values are separate objects, as they are off the wire
+    site = f"site{i % args.sites}.example.com"
+    return {
+        'id': 40_000_000 + i,
+        'title': f"Story {i}: " + 'x' * 60,
+        'url': f"https://{site}/posts/{i}",
+        'by': f"user{rng.randrange(args.authors)}",
+        'created_at': datetime.fromtimestamp(1_700_000_000 + i * 60),
+        'score': rng.randrange(500),
+        'comment_count': rng.randrange(200),
+        'comments': [f"comment {i}.{c} " + 'c' * 200 for c in range(args.comments)],
+        'content': f"content {i} " + 'w' * args.content_chars,
+        'links': [f"https://{site}/posts/{i}/ref/{n}" for n in range(args.links)],
+        'summary': f"summary {i} " + 's' * 300,
+        'comment_summaries': [f"comment summary {i}.{c} " + 'm' * 100 for c in range(args.comments)],
+        'tags': [{'name': rng.choice(TAG_NAMES).encode().decode(), 'score': 0.8} for _ in range(3)],
+        'timings': {'hackernews_story': 0.1, 'ContentFetcher': 0.2, 'ContentSummarizer': 0.5,
+                    'ContentTagger': 0.4, 'CommentSummarizer': 0.6},
+    }
+
+def as_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+    return data
+
+def as_record(data: Dict[str, Any]) -> Story:
+    data['by'] = sys.intern(data['by'])
+    for tag in data['tags']:
+        tag['name'] = sys.intern(tag['name'])
+    return Story(**data)
+
+def measure(name: str, build: Callable[[Dict[str, Any]], Any], args) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    stories: List[Any] = [build(raw_story(i, args, rng)) for i in range(args.stories)]
+    build_seconds = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for story in stories:
+        story.get('title'), story.get('content'), story.get('links', []), story.get('missing')
+    get_seconds = time.perf_counter() - start
+
+    del stories
+    gc.collect()
+    return {
+        'name': name,
+        'held_mb': held / 1e6,
+        'peak_mb': peak / 1e6,
+        'bytes_per_story': held / args.stories,
+        'build_seconds': build_seconds,
+        'get_ns': get_seconds / (args.stories * 4) * 1e9,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory held by dict stories and Story records')
+    parser.add_argument('--stories', type=int, default=100_000)
+    parser.add_argument('--content-chars', type=int, default=4000, help='Article text kept per story after the token budget')
+    parser.add_argument('--comments', type=int, default=5, help='Comments (and comment summaries) per story')
+    parser.add_argument('--links', type=int, default=20, help='Links extracted per story')
+    parser.add_argument('--sites', type=int, default=2000, help='Distinct sites the stories link to')
+    parser.add_argument('--authors', type=int, default=20000, help='Distinct story authors')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', type=str, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = [measure('dict', as_dict, args), measure('story', as_record, args)]
+
+    print(f"{args.stories} stories, {args.content_chars} content chars, {args.comments} comments, {args.links} links each")
+    print(f"{'':8} {'held MB':>10} {'peak MB':>10} {'B/story':>10} {'build s':>9} {'get ns':>8}")
+    for result in results:
+        print(f"{result['name']:8} {result['held_mb']:10.1f} {result['peak_mb']:10.1f} "
+              f"{result['bytes_per_story']:10.0f} {result['build_seconds']:9.2f} {result['get_ns']:8.0f}")
+    saved = results[0]['held_mb'] - results[1]['held_mb']
+    print(f"Story records hold {saved:.1f} MB less ({saved / results[0]['held_mb']:.0%}); "
+          f"get is {results[1]['get_ns'] / results[0]['get_ns']:.1f}x the dict's time")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
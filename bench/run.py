@@ -0,0 +1,195 @@
+"""End-to-end throughput benchmark against local stand-in services.
+
+Starts fake Hacker News, article, OpenAI and Elasticsearch servers, builds
+the pipeline with Config.from_yaml pointed at them, and runs source ->
+transformers -> Elasticsearch -> destination. Reports stories/sec,
+p50/p95 latency per stage and peak RSS.
+
+Usage:
+    python bench/run.py --stories 25
+    python bench/run.py --stories 10000 --llm-latency 0.5 --throttle-rate 0.05 --json bench.json
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from fake_services import HNService, ArticleService, OpenAIService, ElasticsearchService
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StageTimer:
+    """Collects per-call latencies by stage name"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return timed
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            self.samples[name].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        def percentile(values: List[float], q: float) -> float:
+            return values[min(len(values) - 1, int(q * len(values)))]
+
+        result = {}
+        for name, values in self.samples.items():
+            values = sorted(values)
+            result[name] = {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.50) * 1000,
+                'p95_ms': percentile(values, 0.95) * 1000,
+                'total_s': sum(values),
+            }
+        return result
+
+def build_config(args, hn_url: str, output_dir: str) -> dict:
+    llm_stages = ['summarizer_tagger'] if args.fused else ['summarizer', 'content_tagger']
+    transformers = [{'type': 'content_fetcher', 'workers': args.fetch_workers,
+                     'args': {'cache': args.caches, 'cache_path': os.path.join(output_dir, 'http.sqlite'),
+                              'extractor': args.extractor}}]
+    transformers += [{'type': name, 'workers': args.llm_workers, 'args': {}} for name in llm_stages]
+    if args.comments:
+        transformers.append({'type': 'comment_summarizer', 'workers': args.llm_workers, 'args': {}})
+    return {
+        'source': {'type': 'hackernews', 'args': {
+            'api_url': f"{hn_url}/v0", 'limit': args.stories, 'max_workers': args.source_workers,
+            'fetch_comments': args.comments > 0,
+            'comments': {'max_depth': 2, 'max_comments': args.comments * 2}
+        }},
+        'transformers': transformers,
+        'formatter': {'type': 'html', 'args': {'template_path': 'templates/html/digest.html'}},
+        'destination': {'type': 'file', 'args': {'output_dir': output_dir}},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark a hackerman run against local fake services')
+    parser.add_argument('--stories', type=int, default=25)
+    parser.add_argument('--comments', type=int, default=5, help='Top-level comments per story (0 disables)')
+    parser.add_argument('--paragraphs', type=int, default=40, help='Paragraphs per article page')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Mean fake OpenAI latency in seconds')
+    parser.add_argument('--llm-jitter', type=float, default=0.05)
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of OpenAI calls answered with 429')
+    parser.add_argument('--source-workers', type=int, default=8)
+    parser.add_argument('--fetch-workers', type=int, default=8)
+    parser.add_argument('--llm-workers', type=int, default=4)
+    parser.add_argument('--extractor', type=str, default='lxml')
+    parser.add_argument('--fused', action='store_true', help='Use summarizer_tagger instead of summarizer + content_tagger')
+    parser.add_argument('--caches', action='store_true', help='Keep the HTTP and LLM caches enabled')
+    parser.add_argument('--json', type=str, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    hn = None
+    services = []
+    try:
+        articles = ArticleService(paragraphs=args.paragraphs).start()
+        hn = HNService(stories=args.stories, article_url=articles.url,
+                       comments_per_story=args.comments).start()
+        openai = OpenAIService(latency=args.llm_latency, jitter=args.llm_jitter,
+                               throttle_rate=args.throttle_rate).start()
+        es = ElasticsearchService().start()
+        services = [articles, hn, openai, es]
+
+        work_dir = tempfile.mkdtemp(prefix='hackerman-bench-')
+        # Point every client at the stand-ins before anything reads the environment
+        os.environ.update({
+            'OPENAI_API_KEY': 'bench',
+            'OPENAI_BASE_URL': f"{openai.url}/v1",
+            'ELASTICSEARCH_HOST': es.url,
+            'LLM_CACHE_PATH': os.path.join(work_dir, 'llm.sqlite'),
+        })
+        os.environ.setdefault('HTTP_HOST_LIMITS', '127.0.0.1=32')
+        os.environ.setdefault('OPENAI_REQUESTS_PER_MINUTE', '100000')
+        os.environ.setdefault('OPENAI_TOKENS_PER_MINUTE', '100000000')
+        os.environ.setdefault('OPENAI_MAX_CONCURRENCY', str(args.llm_workers * 4))
+
+        os.chdir(REPO_ROOT)
+        from config import Config
+        from cache.llm import configure_llm_cache
+        from elasticsearch_dsl.connections import connections
+        from repository import ArticleWriter
+        from transformers.pipeline import TransformerPipeline
+        from transformers.rate_limiter import get_rate_limiter
+
+        configure_llm_cache(enabled=args.caches)
+        config_path = os.path.join(work_dir, 'config.yaml')
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(build_config(args, hn.url, work_dir), f)
+
+        startup = time.perf_counter()
+        source, transformers, formatter, destination = Config.from_yaml(config_path)
+        startup = time.perf_counter() - startup
+        connections.create_connection(hosts=[es.url])
+
+        timer = StageTimer()
+        source._get_item = timer.wrap('hn_item', source._get_item)
+        for transformer in transformers:
+            transformer.transform = timer.wrap(type(transformer).__name__, transformer.transform)
+
+        start = time.perf_counter()
+        processed = TransformerPipeline(transformers).process_stream(source.stream_data())
+        pipeline_seconds = time.perf_counter() - start
+
+        writer = ArticleWriter()
+        timer.wrap('elasticsearch_bulk', writer.write)(processed)
+        content = timer.wrap('format', formatter.format)("", processed)
+        timer.wrap('deliver', destination.send)(content, {'title': 'Benchmark digest'})
+        total_seconds = time.perf_counter() - start
+
+        for transformer in transformers:
+            transformer.close()
+
+        results = {
+            'stories': len(processed),
+            'startup_s': startup,
+            'pipeline_s': pipeline_seconds,
+            'total_s': total_seconds,
+            'stories_per_s': len(processed) / total_seconds if total_seconds else 0,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'openai_requests': openai.requests,
+            'openai_throttled': openai.throttled,
+            'es_bulk_requests': es.bulk_requests,
+            'es_documents': sum(len(docs) for docs in es.docs.values()),
+            'stages': timer.summary(),
+        }
+    finally:
+        for service in services:
+            service.stop()
+
+    print(f"\n{results['stories']} stories in {results['total_s']:.2f}s "
+          f"({results['stories_per_s']:.2f} stories/s), startup {results['startup_s'] * 1000:.0f} ms, "
+          f"peak RSS {results['peak_rss_mb']:.1f} MB")
+    print(f"OpenAI: {results['openai_requests']} requests, {results['openai_throttled']} throttled; "
+          f"Elasticsearch: {results['es_bulk_requests']} bulk requests, {results['es_documents']} documents")
+    print(get_rate_limiter().report())
+    print(f"\n{'stage':<22} {'calls':>7} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9}")
+    for name, stage in results['stages'].items():
+        print(f"{name:<22} {stage['count']:>7} {stage['p50_ms']:>9.1f} {stage['p95_ms']:>9.1f} {stage['total_s']:>9.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import os
+import argparse
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict
+from dotenv import load_dotenv
+from elasticsearch_dsl.connections import connections
+
+from sources.base import DataSource
+from transformers.pipeline import TransformerPipeline
+from repository import ArticleWriter, find_processed
+from config import Config, ConfigurationError
+from cache.llm import configure_llm_cache
+from metrics import instrument
+from tracing import configure_tracing
+from main import report
+
+def backfill(source: DataSource, pipeline: TransformerPipeline, writer: ArticleWriter, window: int = 500,
+             reprocess_after_hours: float = 87600, on_window: Callable[[], None] = None,
+             stop: threading.Event = None, **range_args) -> Dict[str, int]:
+    """Stream `source.stream_backfill(**range_args)` through the pipeline, writing every `window` stories.
+
+    Stories indexed recently are only refreshed, also `window` at a time.
+    `on_window` runs after each write and may raise to abandon the rest of
+    the range. Setting `stop` abandons it sooner: no more stories are read,
+    the pipeline is closed at the next result and the current window is not
+    written. Returns the indexed, failed and refreshed totals.
+    """
+    stop = stop or threading.Event()
+    start = time.perf_counter()
+    totals = {'indexed': 0, 'failed': 0, 'refreshed': 0}
+    lock = threading.Lock()
+    # An error raised on the feeder thread, re-raised once the pipeline has drained
+    errors = []
+
+    def progress():
+        elapsed = time.perf_counter() - start
+        with lock:
+            print(f"Backfill at id {source.position}: {totals['indexed']} indexed, {totals['failed']} failed, "
+                  f"{totals['refreshed']} refreshed | {totals['indexed'] / elapsed:.2f} stories/s, "
+                  f"{source.scanned / elapsed:.0f} ids/s")
+        if on_window:
+            on_window()
+
+    def refresh(stale):
+        if stale:
+            refreshed = writer.refresh_stats(stale)[0]
+            with lock:
+                totals['refreshed'] += refreshed
+            progress()
+
+    def new_stories():
+        # Runs on the pipeline's feeder thread. Over an already indexed range nearly
+        # every story is refresh_only and nothing reaches the consumer, so drain here.
+        stale = []
+        try:
+            for story in source.stream_backfill(
+                skip_ids=lambda ids: find_processed(ids, reprocess_after_hours), **range_args
+            ):
+                if stop.is_set():
+                    return
+                if not story.get('refresh_only'):
+                    yield story
+                    continue
+                stale.append(story)
+                if len(stale) >= window:
+                    refresh(stale)
+                    stale = []
+            refresh(stale)
+        except Exception as e:
+            errors.append(e)
+
+    def flush(stories):
+        if stories:
+            indexed, failed = writer.write(stories)
+            with lock:
+                totals['indexed'] += indexed
+                totals['failed'] += len(failed)
+            progress()
+
+    # Results stream out of the pipeline as they finish and only one window is held at a time
+    stories = []
+    for _, story in pipeline.stream(new_stories()):
+        if stop.is_set():
+            # Leaving the loop closes the stream and discards the stories still in flight
+            break
+        stories.append(story)
+        if len(stories) >= window:
+            flush(stories)
+            stories = []
+    if stop.is_set():
+        return totals
+    if errors:
+        raise errors[0]
+    flush(stories)
+    return totals
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Hackerman: backfill the archive index from Hacker News history')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to YAML configuration file')
+    parser.add_argument('--from-id', type=int, help='Highest item id to start from (default: maxitem)')
+    parser.add_argument('--to-id', type=int, help='Lowest item id to walk down to (default: 1)')
+    parser.add_argument('--since', type=datetime.fromisoformat, help='Oldest posting date to include, e.g. 2024-01-01')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='Posting date to start before, e.g. 2024-04-01')
+    parser.add_argument('--window', type=int, default=int(os.getenv('BACKFILL_WINDOW', '500')),
+                        help='Stories per Elasticsearch bulk write; bounds memory use')
+    parser.add_argument('--batch-size', type=int, help='Item ids fetched per batch (default: 4x the source workers)')
+    parser.add_argument('--reprocess-after-hours', type=float, default=float(os.getenv('BACKFILL_REPROCESS_AFTER_HOURS', '87600')),
+                        help='Only refresh the stats of stories indexed more recently than this')
+    parser.add_argument('--no-llm-cache', action='store_true', help='Bypass the LLM result cache')
+    parser.add_argument('--metrics-textfile', type=str, default=os.getenv('METRICS_TEXTFILE', 'metrics/hackerman.prom'),
+                        help='Prometheus textfile to write run metrics to')
+    parser.add_argument('--metrics-json', type=str, default=os.getenv('METRICS_JSON', 'metrics/hackerman.json'),
+                        help='JSON file to write the run metrics summary to')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace of the run to this file (open in Perfetto)')
+    args = parser.parse_args()
+
+    configure_llm_cache(enabled=not args.no_llm_cache)
+    configure_tracing(enabled=bool(args.trace))
+
+    # Only the source and transformers are used; nothing is delivered
+    source, transformers, _, _ = Config.from_yaml(args.config)
+    if not hasattr(source, 'stream_backfill'):
+        raise ConfigurationError(f"{type(source).__name__} does not support backfilling")
+
+    connections.create_connection(hosts=[os.getenv('ELASTICSEARCH_HOST', 'localhost:9200')])
+
+    for transformer in transformers:
+        instrument(transformer, 'transform')
+    writer = ArticleWriter(chunk_size=int(os.getenv('ES_BULK_CHUNK_SIZE', '500')))
+    instrument(writer, 'write', 'elasticsearch_write')
+    instrument(writer, 'refresh_stats', 'elasticsearch_refresh')
+    pipeline = TransformerPipeline(transformers)
+
+    backfill(source, pipeline, writer, window=args.window, reprocess_after_hours=args.reprocess_after_hours,
+             start_id=args.from_id, stop_id=args.to_id, since=args.since, until=args.until,
+             batch_size=args.batch_size)
+
+    report(transformers, args)
+
+if __name__ == "__main__":
+    main()
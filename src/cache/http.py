@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from metrics import get_metrics
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ref', 'ref_src'}
+
+class HTTPCache:
+    """On-disk cache of fetched pages, keyed by normalized URL and `namespace`.
+
+    Entries keep the validators (ETag/Last-Modified) plus the extracted
+    text and links, so a fresh hit or a 304 never re-parses the page.
+    Entries older than `ttl` seconds are revalidated with a conditional GET,
+    and the least recently used entries are evicted above `max_bytes`.
+    Since entries hold extracted output, `namespace` names the extractor
+    and its version; changing it makes earlier extractions miss.
+    """
+
+    def __init__(self, path: str = '.cache/http.sqlite', ttl: int = 3600,
+                 max_bytes: int = 100 * 1024 * 1024, namespace: str = ''):
+        self.ttl = ttl
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'revalidations': 0}
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content TEXT,
+                links TEXT,
+                size INTEGER,
+                fetched_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Normalize a URL so trivially different spellings share an entry"""
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').lower()
+        if parts.port and not (scheme == 'http' and parts.port == 80) and not (scheme == 'https' and parts.port == 443):
+            host = f"{host}:{parts.port}"
+        query = sorted(
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.startswith('utm_') and key not in TRACKING_PARAMS
+        )
+        return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+    def key(self, url: str) -> str:
+        return f"{self.namespace}:{self.normalize_url(url)}" if self.namespace else self.normalize_url(url)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a URL, marking it fresh or stale"""
+        key = self.key(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content, links, fetched_at FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), key))
+            self.conn.commit()
+        etag, last_modified, content, links, fetched_at = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content': content,
+            'links': json.loads(links),
+            'fresh': time.time() - fetched_at < self.ttl
+        }
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build revalidation headers for a stale entry"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url: str, content: str, links: List[str], etag: str = None, last_modified: str = None):
+        """Store the extracted result of a page and evict down to the size bound"""
+        links_json = json.dumps(links)
+        size = len(content.encode('utf-8')) + len(links_json)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(url), etag, last_modified, content, links_json, size, now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, url: str):
+        """Mark an entry as revalidated (the server answered 304)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, self.key(url))
+            )
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self.conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+
+    def record(self, outcome: str):
+        """Count a lookup outcome: hits, misses or revalidations"""
+        with self.lock:
+            self.stats[outcome] += 1
+        get_metrics().inc('http_cache_lookups_total', outcome=outcome)
+
+    def report(self) -> str:
+        """Summarize cache effectiveness for the run"""
+        return (f"HTTP cache: {self.stats['hits']} hits, {self.stats['misses']} misses, "
+                f"{self.stats['revalidations']} revalidations")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from dotenv import load_dotenv
+
+class LLMCache:
+    """Persistent cache of LLM responses shared by all LLM transformers.
+
+    Responses are keyed on (model, prompt template version, hash of the
+    rendered prompt), so unchanged content costs no LLM call on the next
+    run. Entries older than `max_age_hours` are dropped, and the oldest
+    entries are evicted above `max_entries`.
+    """
+
+    def __init__(self, path: str = '.cache/llm.sqlite', max_age_hours: float = 168,
+                 max_entries: int = 50000):
+        self.max_age = max_age_hours * 3600
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0}
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                prompt_version TEXT,
+                response TEXT,
+                created_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, prompt: str) -> str:
+        content_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{model}\0{prompt_version}\0{content_hash}".encode('utf-8')).hexdigest()
+
+    def get(self, model: str, prompt_version: str, prompt: str) -> Optional[str]:
+        """Return the cached response for a prompt, if any"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                (self.make_key(model, prompt_version, prompt), time.time() - self.max_age)
+            ).fetchone()
+            self.stats['hits' if row else 'misses'] += 1
+        return row[0] if row else None
+
+    def put(self, model: str, prompt_version: str, prompt: str, response: str):
+        """Store a response for a prompt"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(model, prompt_version, prompt), model, prompt_version, response, time.time())
+            )
+            self.conn.commit()
+
+    def evict(self):
+        """Drop expired entries and the oldest ones above max_entries"""
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age,))
+            self.conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self.conn.commit()
+
+    def clear(self):
+        """Remove every cached response"""
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def report(self) -> str:
+        """Summarize cache effectiveness for the run"""
+        return f"LLM cache: {self.stats['hits']} hits, {self.stats['misses']} misses"
+
+_cache: Optional[LLMCache] = None
+_enabled = True
+_cache_lock = threading.Lock()
+
+def configure_llm_cache(enabled: bool = True, clear: bool = False):
+    """Enable, bypass or clear the shared LLM cache (e.g. from CLI flags)"""
+    global _enabled
+    _enabled = enabled
+    if clear:
+        # Clearing works even when the cache is bypassed for this run
+        cache = _open_cache()
+        cache.clear()
+        print("Cleared LLM cache")
+
+def _open_cache() -> LLMCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            load_dotenv()
+            _cache = LLMCache(
+                path=os.getenv('LLM_CACHE_PATH', '.cache/llm.sqlite'),
+                max_age_hours=float(os.getenv('LLM_CACHE_MAX_AGE_HOURS', '168')),
+                max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '50000'))
+            )
+        return _cache
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when it is bypassed"""
+    return _open_cache() if _enabled else None
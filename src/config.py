@@ -1,49 +1,75 @@
+import importlib
 import os
+import sys
+import time
+from importlib.metadata import entry_points
 from typing import Dict, Any, Type
 import yaml
 from dotenv import load_dotenv
 
 from sources.base import DataSource
-from sources.hackernews import HackerNewsSource
 from transformers.base import Transformer
-from transformers.content_fetcher import ContentFetcher
-from transformers.summarizer import ContentSummarizer
-from transformers.content_tagger import ContentTagger
-from transformers.comment_summarizer import CommentSummarizer
 from formatters.base import Formatter
-from formatters.markdown import MarkdownFormatter
-from formatters.html import HTMLFormatter
 from destinations.base import Destination
-from destinations.email import EmailDestination
-from destinations.telegram import TelegramDestination
-from destinations.file import FileDestination
 
 class ConfigurationError(Exception):
     pass
 
 class Config:
-    # Registry of available components
+    # Registry of available components as dotted paths, imported only when a
+    # config names them. Plugins can add more through the entry point groups
+    # hackerman.sources, hackerman.transformers, hackerman.formatters and
+    # hackerman.destinations.
     SOURCES = {
-        'hackernews': HackerNewsSource
+        'hackernews': 'sources.hackernews.HackerNewsSource'
     }
     
     TRANSFORMERS = {
-        'content_fetcher': ContentFetcher,
-        'summarizer': ContentSummarizer,
-        'content_tagger': ContentTagger,
-        'comment_summarizer': CommentSummarizer
+        'content_fetcher': 'transformers.content_fetcher.ContentFetcher',
+        'summarizer': 'transformers.summarizer.ContentSummarizer',
+        'content_tagger': 'transformers.content_tagger.ContentTagger',
+        'comment_summarizer': 'transformers.comment_summarizer.CommentSummarizer',
+        'summarizer_tagger': 'transformers.summarize_tagger.SummarizerTagger'
     }
     
     FORMATTERS = {
-        'markdown': MarkdownFormatter,
-        'html': HTMLFormatter
+        'markdown': 'formatters.markdown.MarkdownFormatter',
+        'html': 'formatters.html.HTMLFormatter'
     }
     
     DESTINATIONS = {
-        'email': EmailDestination,
-        'telegram': TelegramDestination,
-        'file': FileDestination
+        'email': 'destinations.email.EmailDestination',
+        'telegram': 'destinations.telegram.TelegramDestination',
+        'file': 'destinations.file.FileDestination'
     }
+
+    # Seconds spent importing each resolved component, including its dependencies
+    import_times: Dict[str, float] = {}
+
+    @classmethod
+    def resolve(cls, registry: Dict[str, str], name: str, group: str = None) -> Type:
+        """Import a component class by registry name, falling back to entry point plugins"""
+        start = time.perf_counter()
+        if name in registry:
+            module_path, _, class_name = registry[name].rpartition('.')
+            try:
+                component_class = getattr(importlib.import_module(module_path), class_name)
+            except (ImportError, AttributeError) as e:
+                raise ConfigurationError(f"Error importing {name} ({registry[name]}): {str(e)}")
+        else:
+            plugins = entry_points(group=group, name=name) if group else ()
+            if not plugins:
+                raise ConfigurationError(f"Unknown component type: {name}")
+            component_class = next(iter(plugins)).load()
+        cls.import_times[name] = time.perf_counter() - start
+        return component_class
+
+    @classmethod
+    def report_import_times(cls) -> str:
+        """Summarize component import times, slowest first"""
+        lines = [f"  {name}: {seconds * 1000:.1f} ms"
+                 for name, seconds in sorted(cls.import_times.items(), key=lambda item: -item[1])]
+        return "Component import times:\n" + "\n".join(lines)
     
     @staticmethod
     def load_yaml(path: str) -> Dict[str, Any]:
@@ -52,14 +78,12 @@ class Config:
             return yaml.safe_load(f)
     
     @classmethod
-    def create_component(cls, component_type: Dict[Type, dict], config: Dict[str, Any]) -> Any:
+    def create_component(cls, component_type: Dict[str, str], config: Dict[str, Any], group: str = None) -> Any:
         """Create a component from configuration"""
         if not config or 'type' not in config:
             raise ConfigurationError(f"Invalid component configuration: {config}")
         
-        component_class = component_type.get(config['type'])
-        if not component_class:
-            raise ConfigurationError(f"Unknown component type: {config['type']}")
+        component_class = cls.resolve(component_type, config['type'], group)
         
         # Get constructor arguments from config
         kwargs = config.get('args', {})
@@ -80,18 +104,28 @@ class Config:
         config = cls.load_yaml(path)
         
         # Create source
-        source = cls.create_component(cls.SOURCES, config.get('source'))
+        source = cls.create_component(cls.SOURCES, config.get('source'), 'hackerman.sources')
         
         # Create transformers
         transformers = []
         for transformer_config in config.get('transformers', []):
-            transformer = cls.create_component(cls.TRANSFORMERS, transformer_config)
+            transformer = cls.create_component(cls.TRANSFORMERS, transformer_config, 'hackerman.transformers')
+            # Stage concurrency for the streaming pipeline lives next to the transformer's args
+            transformer.workers = int(transformer_config.get('workers', transformer.workers))
             transformers.append(transformer)
         
         # Create formatter
-        formatter = cls.create_component(cls.FORMATTERS, config.get('formatter'))
+        formatter = cls.create_component(cls.FORMATTERS, config.get('formatter'), 'hackerman.formatters')
         
         # Create destination
-        destination = cls.create_component(cls.DESTINATIONS, config.get('destination'))
+        destination = cls.create_component(cls.DESTINATIONS, config.get('destination'), 'hackerman.destinations')
+        destination.delivery = config['destination'].get('delivery', destination.delivery)
         
         return source, transformers, formatter, destination
+
+if __name__ == "__main__":
+    # Quick config check: build the components and show what importing them cost
+    start = time.perf_counter()
+    Config.from_yaml(sys.argv[1] if len(sys.argv) > 1 else 'config.yaml')
+    print(f"Configuration OK ({(time.perf_counter() - start) * 1000:.1f} ms)")
+    print(Config.report_import_times())
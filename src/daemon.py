@@ -0,0 +1,121 @@
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Set
+
+from sources.base import DataSource
+from transformers.base import Transformer
+from transformers.pipeline import TransformerPipeline
+from formatters.base import Formatter
+from destinations.base import Destination
+from repository import ArticleWriter
+from metrics import get_metrics
+
+class Daemon:
+    """Long-running mode: poll the source for changes and process only those.
+
+    Components are built once, so LLM clients, the HTTP pool and the
+    Elasticsearch connection stay warm across cycles. New stories go
+    through the pipeline and are indexed every poll; changed ones only get
+    their stats refreshed. Digests collect the cycle's stories and are
+    flushed to the destination every `flush_interval` seconds; per_story
+    destinations are sent to as soon as a story is indexed.
+    """
+
+    def __init__(self, source: DataSource, transformers: List[Transformer], formatter: Formatter,
+                 destination: Destination, writer: ArticleWriter, poll_interval: float = 60,
+                 flush_interval: float = 3600, skip_ids: Callable[[List[Any]], Set[Any]] = None,
+                 on_cycle: Callable[[], None] = None):
+        self.source = source
+        self.pipeline = TransformerPipeline(transformers)
+        self.formatter = formatter
+        self.destination = destination
+        self.writer = writer
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.skip_ids = skip_ids
+        self.on_cycle = on_cycle
+        # Stories waiting for the next digest, keyed by id so a story appears once
+        self.pending: Dict[Any, Dict[str, Any]] = {}
+        # Processed stories whose Elasticsearch write failed, retried next cycle
+        self.unindexed: List[Dict[str, Any]] = []
+        self.stopping = threading.Event()
+
+    def stop(self, *_):
+        self.stopping.set()
+
+    def cycle(self):
+        """Poll once, process new stories and refresh changed ones"""
+        refreshed = []
+        offered = []
+
+        def new_stories():
+            for story in self.source.stream_updates(skip_ids=self.skip_ids):
+                if story.get('refresh_only'):
+                    refreshed.append(story)
+                else:
+                    offered.append(story.get('id'))
+                    yield story
+
+        results = self.pipeline.process_stream(new_stories())
+        # Stories a transformer dropped with an exception are offered again next poll
+        done = {story.get('id') for story in results}
+        dropped = [story_id for story_id in offered if story_id not in done]
+        if dropped:
+            self.source.retry(dropped)
+        processed = self.unindexed + results
+        self.unindexed = []
+        if processed:
+            try:
+                indexed, failed = self.writer.write(processed)
+            except Exception:
+                # Keep the LLM work; the source will not offer these stories again
+                self.unindexed = processed
+                raise
+            print(f"Indexed {indexed} new articles ({len(failed)} failed)")
+        if refreshed:
+            count, _ = self.writer.refresh_stats(refreshed)
+            print(f"Refreshed stats for {count} changed articles")
+
+        if self.destination.delivery == 'per_story':
+            messages = [(self.formatter.format("", [story]), story) for story in processed]
+            if messages:
+                print(f"Delivered {sum(self.destination.send_batch(messages))} of {len(messages)} stories")
+        else:
+            for story in processed:
+                self.pending[story.get('id')] = story
+        get_metrics().inc('daemon_cycles_total')
+
+    def flush(self):
+        """Send the pending stories as one digest"""
+        if not self.pending:
+            return
+        stories = list(self.pending.values())
+        formatted_content = self.formatter.format("", stories)
+        metadata = {'title': f"Hacker News Digest ({len(stories)} stories)", 'count': len(stories)}
+        if self.destination.send(formatted_content, metadata=metadata) is not False:
+            self.pending.clear()
+
+    def run(self):
+        """Poll until SIGINT/SIGTERM, then flush what is pending"""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        last_flush = time.monotonic()
+        print(f"Polling every {self.poll_interval:g}s, flushing digests every {self.flush_interval:g}s")
+        while not self.stopping.is_set():
+            started = time.monotonic()
+            try:
+                self.cycle()
+                if started - last_flush >= self.flush_interval:
+                    self.flush()
+                    last_flush = started
+            except Exception as e:
+                # A failed cycle (ES or destination down) is retried on the next poll
+                print(f"Error in polling cycle: {str(e)}")
+                get_metrics().inc('daemon_cycle_errors_total')
+            if self.on_cycle:
+                self.on_cycle()
+            self.stopping.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+        self.flush()
@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 class Destination(ABC):
+    # 'digest' sends one formatted digest per run, 'per_story' one message per story
+    delivery: str = 'digest'
+
     @abstractmethod
     def send(self, content: str, metadata: Dict[str, Any] = None) -> bool:
         """Send content to the destination"""
         pass
+
+    def send_batch(self, messages: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """Send several (content, metadata) messages; destinations with connection setup override this"""
+        return [self.send(content, metadata) for content, metadata in messages]
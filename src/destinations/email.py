@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -13,29 +13,63 @@ class EmailDestination(Destination):
         self.username = username
         self.password = password
         self.from_email = from_email
-        self.to_email = to_email
+        # Several recipients can be given comma-separated
+        self.to_emails = [email.strip() for email in to_email.split(',') if email.strip()]
         self.subject_template = subject_template or "Hackerman Update: {title}"
+        self.server = None
+
+    def _connect(self):
+        """Open an authenticated SMTP session"""
+        self.server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+        self.server.starttls()
+        self.server.login(self.username, self.password)
+
+    def _disconnect(self):
+        if self.server:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            self.server = None
+
+    def _build_message(self, content: str, metadata: Dict[str, Any] = None) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = ', '.join(self.to_emails)
+
+        # Create subject from template and metadata
+        subject = self.subject_template.format(**(metadata or {}))
+        msg['Subject'] = subject
+
+        msg.attach(MIMEText(content, 'html' if '<html>' in content else 'plain'))
+        return msg
+
+    def _deliver(self, msg: MIMEMultipart):
+        """Send over the open session, reconnecting once if the server dropped it"""
+        if not self.server:
+            self._connect()
+        try:
+            self.server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPSenderRefused, ConnectionError):
+            self._disconnect()
+            self._connect()
+            self.server.send_message(msg)
 
     def send(self, content: str, metadata: Dict[str, Any] = None) -> bool:
         """Send content via email"""
+        return self.send_batch([(content, metadata)])[0]
+
+    def send_batch(self, messages: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """Send several emails over a single authenticated SMTP session"""
+        results = []
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = self.to_email
-            
-            # Create subject from template and metadata
-            subject = self.subject_template.format(**(metadata or {}))
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(content, 'html' if '<html>' in content else 'plain'))
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.send_message(msg)
-            
-            return True
-        except Exception as e:
-            print(f"Error sending email: {str(e)}")
-            return False
+            for content, metadata in messages:
+                try:
+                    self._deliver(self._build_message(content, metadata))
+                    results.append(True)
+                except Exception as e:
+                    print(f"Error sending email: {str(e)}")
+                    results.append(False)
+        finally:
+            self._disconnect()
+        return results
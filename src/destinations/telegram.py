@@ -1,6 +1,6 @@
 import os
 from typing import Dict, Any
-import requests
+from http_client import get_http_client
 from .base import Destination
 
 class TelegramDestination(Destination):
@@ -24,7 +24,7 @@ class TelegramDestination(Destination):
             if len(content) > 4096:
                 content = content[:4093] + "..."
             
-            response = requests.post(
+            response = get_http_client().post(
                 f"{self.base_url}/sendMessage",
                 json={
                     'chat_id': self.chat_id,
@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Any, Mapping
 
 class Formatter(ABC):
     @abstractmethod
-    def format(self, data: Dict[str, Any]) -> str:
+    def format(self, data: Mapping[str, Any]) -> str:
         """Format the data into a string representation"""
         pass
@@ -1,6 +1,8 @@
 import os
 from datetime import datetime
+from typing import List, Union
 from jinja2 import Environment, FileSystemLoader
+from story import Story
 from .base import Formatter
 
 class HTMLFormatter(Formatter):
@@ -9,7 +11,7 @@ class HTMLFormatter(Formatter):
         template_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.env = Environment(loader=FileSystemLoader(template_dir))
         
-    def format(self, content: str, metadata: dict) -> str:
+    def format(self, content: str, metadata: Union[Story, List[Story]]) -> str:
         """Format content and metadata into HTML"""
         template = self.env.get_template(self.template_path)
         
@@ -22,7 +24,10 @@ class HTMLFormatter(Formatter):
         else:
             # If it's a single article, wrap it in a list
             articles = [metadata]
-            
+
+        # Plain dicts, so fields a Story leaves unset are undefined in the template rather than None
+        articles = [dict(article) for article in articles]
+        
         return template.render(
             articles=articles,
             timestamp=timestamp
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Any, Mapping
 import os
 from jinja2 import Environment, FileSystemLoader
 from .base import Formatter
@@ -11,6 +11,6 @@ class MarkdownFormatter(Formatter):
         env = Environment(loader=FileSystemLoader(template_dir))
         self.template = env.get_template(template_file)
 
-    def format(self, data: Dict[str, Any]) -> str:
+    def format(self, data: Mapping[str, Any]) -> str:
         """Format the data into markdown"""
         return self.template.render(**data)
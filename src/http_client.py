@@ -0,0 +1,92 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+class HTTPClient:
+    """Shared HTTP client for all outbound I/O.
+
+    One requests.Session keeps connections alive across calls (no repeated
+    DNS/TCP/TLS setup), a per-host semaphore caps concurrent requests to any
+    single host, and connect/read timeouts are set separately.
+    """
+
+    def __init__(self, pool_connections: int = 32, pool_maxsize: int = 16, per_host_limit: int = 4,
+                 host_limits: Dict[str, int] = None, connect_timeout: float = 5, read_timeout: float = 10):
+        self.per_host_limit = per_host_limit
+        self.host_limits = host_limits or {}
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = (urlsplit(url).hostname or '').lower()
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.host_limits.get(host, self.per_host_limit))
+            return self.semaphores[host]
+
+    @contextmanager
+    def limit(self, url: str):
+        """Hold one of the URL host's concurrency slots"""
+        semaphore = self._semaphore(url)
+        with semaphore:
+            yield
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the pooled session.
+
+        Non-streaming requests hold a host slot for the whole call. Streaming
+        callers should wrap the request and body read in `limit(url)`.
+        """
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        if kwargs.get('stream'):
+            return self.session.request(method, url, **kwargs)
+        with self.limit(url):
+            return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+def _parse_host_limits(value: str) -> Dict[str, int]:
+    """Parse 'host=limit,host=limit' into a dict"""
+    limits = {}
+    for entry in value.split(','):
+        if '=' in entry:
+            host, limit = entry.split('=', 1)
+            limits[host.strip().lower()] = int(limit)
+    return limits
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> HTTPClient:
+    """Return the HTTP client shared by every source, transformer and destination"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            load_dotenv()
+            _client = HTTPClient(
+                pool_maxsize=int(os.getenv('HTTP_POOL_SIZE', '16')),
+                per_host_limit=int(os.getenv('HTTP_PER_HOST_LIMIT', '4')),
+                host_limits=_parse_host_limits(os.getenv('HTTP_HOST_LIMITS', 'hacker-news.firebaseio.com=16')),
+                connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+                read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+            )
+        return _client
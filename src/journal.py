@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from transformers.base import Transformer
+from story import Story
+
+class RunJournal:
+    """Append-only JSONL journal of a run's progress, for resuming after a crash.
+
+    Each line is one event: a story from the source, a story's output after
+    a transformer stage, stories indexed in Elasticsearch, messages
+    delivered, and finally the run's completion. Lines are flushed and
+    fsynced as they are written; a torn last line is ignored on load.
+
+    A resumed run replays journaled stage outputs instead of calling the
+    transformers again, and skips stories already indexed or delivered.
+    Outputs that carry a stage error are not journaled, so resuming after
+    a transient outage retries those stories.
+    """
+
+    def __init__(self, path: str = '.cache/journal.jsonl'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.sources: Dict[Any, Story] = {}
+        self.source_done = False
+        # Latest completed stage per story id: (stage index, output, transformer name)
+        self.stages: Dict[Any, Tuple[int, Story, str]] = {}
+        self.indexed: Set[Any] = set()
+        self.delivered: Set[Any] = set()
+        self.complete = False
+
+    def open(self, resume: bool = False) -> 'RunJournal':
+        """Start a new journal, or load the existing one and keep appending to it"""
+        if resume and os.path.exists(self.path):
+            self._load()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if self.file.tell() and not self._ends_with_newline():
+            # Terminate a torn last line so the next record starts on its own line
+            self.file.write('\n')
+        return self
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    @staticmethod
+    def _decode_story(story: Dict[str, Any]) -> Story:
+        if isinstance(story.get('created_at'), str):
+            story['created_at'] = datetime.fromisoformat(story['created_at'])
+        return Story.from_dict(story)
+
+    @staticmethod
+    def _encode(value: Any) -> Any:
+        if isinstance(value, Story):
+            return value.to_dict()
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The process died while writing this line
+                    continue
+                event = record.get('event')
+                if event == 'source':
+                    self.sources[record['id']] = self._decode_story(record['story'])
+                elif event == 'source_done':
+                    self.source_done = True
+                elif event == 'stage':
+                    self.stages[record['id']] = (record['stage'], self._decode_story(record['story']), record['name'])
+                elif event == 'indexed':
+                    self.indexed.update(record['ids'])
+                elif event == 'delivered':
+                    self.delivered.update(record['ids'])
+                elif event == 'complete':
+                    self.complete = True
+
+    def _append(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=self._encode)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def stories(self, stream: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield the source's stories, replaying the journaled ones if the source had finished"""
+        if self.source_done:
+            yield from self.sources.values()
+            return
+        for story in stream:
+            if story.get('id') is not None:
+                self._append({'event': 'source', 'id': story['id'], 'story': story})
+            yield story
+        self._append({'event': 'source_done'})
+
+    def wrap(self, transformers: List[Transformer]):
+        """Journal each transformer's outputs and replay the outputs of completed stages"""
+        names = [type(transformer).__name__ for transformer in transformers]
+
+        def replayable(story_id: Any, stage: int) -> Optional[Story]:
+            done = self.stages.get(story_id)
+            if not done:
+                return None
+            done_stage, story, name = done
+            # Only reuse an output produced by the same transformer at the same position
+            if stage <= done_stage < len(names) and names[done_stage] == name:
+                return story
+            return None
+
+        for stage, transformer in enumerate(transformers):
+            def transform(data: Dict[str, Any], stage=stage, original=transformer.transform) -> Dict[str, Any]:
+                story_id = data.get('id')
+                replayed = replayable(story_id, stage)
+                if replayed is not None:
+                    return replayed
+                result = original(data)
+                # A placeholder left by a failed stage is retried on resume, not replayed
+                if story_id is not None and not result.get('errors'):
+                    self._append({'event': 'stage', 'id': story_id, 'stage': stage,
+                                  'name': names[stage], 'story': result})
+                return result
+
+            transformer.transform = transform
+
+    def record_indexed(self, ids: Iterable[Any]):
+        ids = [i for i in ids if i is not None]
+        if ids:
+            self._append({'event': 'indexed', 'ids': ids})
+
+    def record_delivered(self, ids: Iterable[Any]):
+        ids = list(ids)
+        if ids:
+            self._append({'event': 'delivered', 'ids': ids})
+
+    def finish(self):
+        self._append({'event': 'complete'})
+        self.close()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
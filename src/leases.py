@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+# A lease is a dict: shard, low, high (inclusive id bounds), owner, attempt, expires_at.
+# `attempt` is bumped on every claim, so a worker whose lease expired and
+# was reassigned can no longer renew or complete it.
+
+def make_shards(start_id: int, stop_id: int, shard_size: int) -> List[Tuple[str, int, int]]:
+    """Split [stop_id, start_id] into (shard, low, high) blocks aligned to multiples of shard_size.
+
+    Alignment keeps shard names stable when workers see different maxitem values.
+    """
+    shards = []
+    for block in range((stop_id - 1) // shard_size, (start_id - 1) // shard_size + 1):
+        low = max(stop_id, block * shard_size + 1)
+        high = min(start_id, (block + 1) * shard_size)
+        shards.append((f"{shard_size}-{block}", low, high))
+    # Newest ids first, matching the backfill's downward walk
+    return sorted(shards, key=lambda shard: -shard[2])
+
+class LeaseStore(ABC):
+    """Table of id-range shards that workers claim for a limited time"""
+
+    @abstractmethod
+    def create(self, shards: List[Tuple[str, int, int]]):
+        """Add shards that do not exist yet; existing shards keep their state"""
+        pass
+
+    @abstractmethod
+    def claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Lease the highest pending or expired shard, or return None"""
+        pass
+
+    @abstractmethod
+    def renew(self, lease: Dict[str, Any], lease_seconds: float) -> bool:
+        """Extend a lease; False if it was reassigned to another worker"""
+        pass
+
+    @abstractmethod
+    def complete(self, lease: Dict[str, Any]) -> bool:
+        """Mark a leased shard done; False if it was reassigned to another worker"""
+        pass
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of shards per status: pending, leased, done"""
+        pass
+
+class SQLiteLeaseStore(LeaseStore):
+    """Lease table in a local SQLite file, for workers on a single host"""
+
+    def __init__(self, path: str = '.cache/leases.sqlite'):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode; claims take the write lock explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                shard TEXT PRIMARY KEY,
+                low INTEGER,
+                high INTEGER,
+                status TEXT,
+                owner TEXT,
+                attempt INTEGER,
+                expires_at REAL
+            )
+        """)
+
+    def create(self, shards: List[Tuple[str, int, int]]):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO shards VALUES (?, ?, ?, 'pending', NULL, 0, 0)",
+                shards
+            )
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT shard, low, high, attempt FROM shards "
+                    "WHERE status = 'pending' OR (status = 'leased' AND expires_at < ?) "
+                    "ORDER BY high DESC LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                shard, low, high, attempt = row
+                self.conn.execute(
+                    "UPDATE shards SET status = 'leased', owner = ?, attempt = ?, expires_at = ? WHERE shard = ?",
+                    (owner, attempt + 1, now + lease_seconds, shard)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return {'shard': shard, 'low': low, 'high': high, 'owner': owner,
+                'attempt': attempt + 1, 'expires_at': now + lease_seconds}
+
+    def _update_own(self, lease: Dict[str, Any], status: str, expires_at: float) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE shards SET status = ?, expires_at = ? "
+                "WHERE shard = ? AND owner = ? AND attempt = ? AND status = 'leased'",
+                (status, expires_at, lease['shard'], lease['owner'], lease['attempt'])
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, lease: Dict[str, Any], lease_seconds: float) -> bool:
+        lease['expires_at'] = time.time() + lease_seconds
+        return self._update_own(lease, 'leased', lease['expires_at'])
+
+    def complete(self, lease: Dict[str, Any]) -> bool:
+        return self._update_own(lease, 'done', 0)
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND expires_at < ? THEN 'pending' ELSE status END, COUNT(*) "
+                "FROM shards GROUP BY 1",
+                (time.time(),)
+            ).fetchall()
+        return {'pending': 0, 'leased': 0, 'done': 0, **dict(rows)}
+
+class ElasticsearchLeaseStore(LeaseStore):
+    """Lease table as documents in the Elasticsearch cluster, for workers on several hosts.
+
+    Claims and renewals are conditional updates on the document's sequence
+    number, so two workers can never both win the same shard.
+    """
+
+    def __init__(self, index: str = 'hackerman-leases', using: str = 'default'):
+        from elasticsearch_dsl.connections import connections
+
+        self.index = index
+        self.es = connections.get_connection(using)
+        if not self.es.indices.exists(index=index):
+            self.es.options(ignore_status=400).indices.create(index=index, mappings={'properties': {
+                'low': {'type': 'long'}, 'high': {'type': 'long'}, 'status': {'type': 'keyword'},
+                'owner': {'type': 'keyword'}, 'attempt': {'type': 'integer'}, 'expires_at': {'type': 'double'}
+            }})
+
+    def create(self, shards: List[Tuple[str, int, int]]):
+        from elasticsearch.helpers import bulk
+
+        actions = (
+            {'_op_type': 'create', '_index': self.index, '_id': shard,
+             '_source': {'low': low, 'high': high, 'status': 'pending', 'owner': None,
+                         'attempt': 0, 'expires_at': 0}}
+            for shard, low, high in shards
+        )
+        # Shards another worker already created fail with a conflict, which is fine
+        bulk(self.es, actions, raise_on_error=False, refresh='wait_for')
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        from elasticsearch import ConflictError
+
+        now = time.time()
+        response = self.es.search(index=self.index, size=10, seq_no_primary_term=True, sort=[{'high': 'desc'}],
+                                  query={'bool': {'should': [
+                                      {'term': {'status': 'pending'}},
+                                      {'bool': {'filter': [{'term': {'status': 'leased'}},
+                                                           {'range': {'expires_at': {'lt': now}}}]}}
+                                  ], 'minimum_should_match': 1}})
+        for hit in response['hits']['hits']:
+            doc = hit['_source']
+            lease = {'shard': hit['_id'], 'low': doc['low'], 'high': doc['high'], 'owner': owner,
+                     'attempt': doc['attempt'] + 1, 'expires_at': now + lease_seconds}
+            try:
+                self.es.update(index=self.index, id=hit['_id'], if_seq_no=hit['_seq_no'],
+                               if_primary_term=hit['_primary_term'], refresh='wait_for',
+                               doc={'status': 'leased', 'owner': owner, 'attempt': lease['attempt'],
+                                    'expires_at': lease['expires_at']})
+                return lease
+            except ConflictError:
+                # Another worker claimed it first
+                continue
+        return None
+
+    def _update_own(self, lease: Dict[str, Any], doc: Dict[str, Any]) -> bool:
+        from elasticsearch import ConflictError
+
+        current = self.es.get(index=self.index, id=lease['shard'])
+        source = current['_source']
+        if (source['status'], source['owner'], source['attempt']) != ('leased', lease['owner'], lease['attempt']):
+            return False
+        try:
+            self.es.update(index=self.index, id=lease['shard'], if_seq_no=current['_seq_no'],
+                           if_primary_term=current['_primary_term'], doc=doc)
+            return True
+        except ConflictError:
+            return False
+
+    def renew(self, lease: Dict[str, Any], lease_seconds: float) -> bool:
+        lease['expires_at'] = time.time() + lease_seconds
+        return self._update_own(lease, {'expires_at': lease['expires_at']})
+
+    def complete(self, lease: Dict[str, Any]) -> bool:
+        return self._update_own(lease, {'status': 'done', 'expires_at': 0})
+
+    def counts(self) -> Dict[str, int]:
+        self.es.indices.refresh(index=self.index)
+        now = time.time()
+        counts = {'pending': 0, 'leased': 0, 'done': 0}
+        for status in counts:
+            query = {'term': {'status': status}}
+            if status == 'leased':
+                query = {'bool': {'filter': [query, {'range': {'expires_at': {'gte': now}}}]}}
+            elif status == 'pending':
+                query = {'bool': {'should': [query, {'bool': {'filter': [
+                    {'term': {'status': 'leased'}}, {'range': {'expires_at': {'lt': now}}}]}}],
+                    'minimum_should_match': 1}}
+            counts[status] = self.es.count(index=self.index, query=query)['count']
+        return counts
+
+def get_lease_store(spec: str) -> LeaseStore:
+    """'elasticsearch' (or 'es') for the cluster-wide table, otherwise a SQLite file path"""
+    if spec in ('elasticsearch', 'es'):
+        return ElasticsearchLeaseStore()
+    return SQLiteLeaseStore(spec)
@@ -1,60 +1,167 @@
 import os
 import argparse
+import time
 from dotenv import load_dotenv
 from elasticsearch_dsl.connections import connections
-from tqdm import tqdm
 
 from transformers.pipeline import TransformerPipeline
-from repository import Article
+from repository import ArticleWriter, find_processed
 from config import Config
+from cache.llm import configure_llm_cache, get_llm_cache
+from transformers.rate_limiter import get_rate_limiter
+from metrics import get_metrics, instrument
+from tracing import configure_tracing, get_tracer
+from journal import RunJournal
+from daemon import Daemon
+from scheduler import DeadlineScheduler
 
 def main():
+    started = time.monotonic()
+    load_dotenv()
+
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Hackerman: Hacker News Content Pipeline')
     parser.add_argument('--config', type=str, default='config.yaml', help='Path to YAML configuration file')
+    parser.add_argument('--no-llm-cache', action='store_true', help='Bypass the LLM result cache for this run')
+    parser.add_argument('--clear-llm-cache', action='store_true', help='Clear the LLM result cache before running')
+    parser.add_argument('--full', action='store_true', help='Reprocess every story, even ones indexed recently')
+    parser.add_argument('--import-times', action='store_true', help='Print how long each component took to import')
+    parser.add_argument('--metrics-textfile', type=str, default=os.getenv('METRICS_TEXTFILE', 'metrics/hackerman.prom'),
+                        help='Prometheus textfile to write run metrics to')
+    parser.add_argument('--metrics-json', type=str, default=os.getenv('METRICS_JSON', 'metrics/hackerman.json'),
+                        help='JSON file to write the run metrics summary to')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace of the run to this file (open in Perfetto)')
+    parser.add_argument('--journal', type=str, default=os.getenv('RUN_JOURNAL_PATH', '.cache/journal.jsonl'),
+                        help='Checkpoint journal recording each story after every stage')
+    parser.add_argument('--resume', action='store_true', help='Resume the last run from its journal')
+    parser.add_argument('--daemon', action='store_true', help='Stay resident and process new or changed stories as they appear')
+    parser.add_argument('--poll-interval', type=float, default=float(os.getenv('POLL_INTERVAL_SECONDS', '60')),
+                        help='Seconds between polls in daemon mode')
+    parser.add_argument('--flush-interval', type=float, default=float(os.getenv('DIGEST_FLUSH_SECONDS', '3600')),
+                        help='Seconds between digest deliveries in daemon mode')
+    parser.add_argument('--deadline', type=float, default=float(os.getenv('DIGEST_DEADLINE_SECONDS', '0')),
+                        help='Deliver whatever is ready this many seconds after start; 0 waits for every story')
+    parser.add_argument('--degraded-entries', action='store_true',
+                        help='List stories that missed the deadline in the digest with their title and link only')
     args = parser.parse_args()
 
+    configure_llm_cache(enabled=not args.no_llm_cache, clear=args.clear_llm_cache)
+    configure_tracing(enabled=bool(args.trace))
+
     # Load configuration
     source, transformers, formatter, destination = Config.from_yaml(args.config)
+    if args.import_times:
+        print(Config.report_import_times())
     
     # Get elasticsearch host from environment
-    load_dotenv()
     es_host = os.getenv('ELASTICSEARCH_HOST', 'localhost:9200')
     
     # Connect to Elasticsearch
     connections.create_connection(hosts=[es_host])
     
+    # Time every stage; transformer timings are also attached to each story
+    instrument(source, 'stream_data', 'source')
+    for transformer in transformers:
+        instrument(transformer, 'transform')
+    # Only the method this delivery mode calls; send and send_batch call each other in some destinations
+    instrument(destination, 'send_batch' if destination.delivery == 'per_story' else 'send', 'destination')
+
+    writer = ArticleWriter(chunk_size=int(os.getenv('ES_BULK_CHUNK_SIZE', '500')))
+    instrument(writer, 'write', 'elasticsearch_write')
+    instrument(writer, 'refresh_stats', 'elasticsearch_refresh')
+
+    # Stories indexed within REPROCESS_AFTER_HOURS only get their stats refreshed
+    reprocess_after_hours = float(os.getenv('REPROCESS_AFTER_HOURS', '24'))
+    skip_ids = None if args.full else (lambda ids: find_processed(ids, reprocess_after_hours))
+
+    if args.daemon:
+        instrument(source, 'stream_updates', 'source')
+        daemon = Daemon(
+            source, transformers, formatter, destination, writer,
+            poll_interval=args.poll_interval, flush_interval=args.flush_interval, skip_ids=skip_ids,
+            # Keep the textfile current so it can be scraped while the daemon runs
+            on_cycle=lambda: get_metrics().write(textfile=args.metrics_textfile, json_path=args.metrics_json)
+        )
+        daemon.run()
+        report(transformers, args)
+        return
+
+    journal = RunJournal(args.journal).open(resume=args.resume)
+    if args.resume and journal.complete:
+        print(f"The run in {args.journal} already completed, nothing to resume")
+        journal.close()
+        return
+
+    # Checkpoint every stage's output; on --resume completed stages are replayed
+    journal.wrap(transformers)
+
     # Initialize pipeline
     pipeline = TransformerPipeline(transformers)
-    
-    # Fetch stories
-    stories = source.fetch_data()
-    
-    # Process stories through the pipeline
-    processed_stories = []
-    with tqdm(total=len(stories), desc="Processing stories") as pbar:
-        for story in stories:
-            processed_story = pipeline.process(story)
-            processed_stories.append(processed_story)
-            pbar.update(1)
-    
-    # Format all stories at once
-    formatted_content = formatter.format("", processed_stories)
-    
-    # Process and send stories to Elasticsearch and destination
-    def process_and_send(data: dict) -> dict:
-        # Save to Elasticsearch
-        article = Article.from_dict(data)
-        article.save()
-        
-        # Send to destination
-        destination.send(formatted_content, metadata=data)
-        
-        return data
-
-    # Process all stories
-    for story in processed_stories:
-        process_and_send(story)
+    refreshed_stories = []
+
+    def new_stories():
+        for story in journal.stories(source.stream_data(skip_ids=skip_ids)):
+            if story.get('refresh_only'):
+                refreshed_stories.append(story)
+            else:
+                yield story
+
+    # Stream stories into the pipeline as soon as they are fetched, highest score first
+    scheduler = DeadlineScheduler(pipeline, deadline=args.deadline or None, started=started)
+    processed_stories, unfinished = scheduler.run(new_stories())
+    entries = processed_stories + (unfinished if args.degraded_entries else [])
+
+    # Send to destination first, so the deadline does not also wait on Elasticsearch
+    if destination.delivery == 'per_story':
+        pending = [story for story in entries if story.get('id') not in journal.delivered]
+        messages = [(formatter.format("", [story]), story) for story in pending]
+        results = destination.send_batch(messages)
+        journal.record_delivered(story.get('id') for story, ok in zip(pending, results) if ok)
+        print(f"Delivered {sum(results)} of {len(messages)} stories")
+    elif entries and 'digest' not in journal.delivered:
+        # Format all stories at once and send the digest a single time
+        formatted_content = formatter.format("", entries)
+        metadata = {'title': f"Hacker News Digest ({len(entries)} stories)", 'count': len(entries)}
+        if destination.send(formatted_content, metadata=metadata) is not False:
+            journal.record_delivered(['digest'])
+
+    def index(stories):
+        # Save stories to Elasticsearch in bulk, skipping those a resumed run already indexed
+        to_index = [story for story in stories if story.get('id') not in journal.indexed]
+        indexed, failed = writer.write(to_index)
+        failed_ids = {str(item.get('update', {}).get('_id')) for item in failed}
+        journal.record_indexed(story.get('id') for story in to_index if str(story.get('id')) not in failed_ids)
+        return indexed, failed
+
+    indexed, failed = index(processed_stories)
+    print(f"Indexed {indexed} articles ({len(failed)} failed)")
+    if unfinished:
+        # Stragglers missed the digest but are still worth indexing
+        indexed, failed = index(scheduler.stragglers())
+        print(f"Indexed {indexed} articles that missed the deadline ({len(failed)} failed)")
+    if refreshed_stories:
+        refreshed, _ = writer.refresh_stats(refreshed_stories)
+        print(f"Refreshed stats for {refreshed} already processed articles")
+    journal.finish()
+
+    report(transformers, args)
+
+def report(transformers, args):
+    """Report per-transformer statistics and run metrics, and release transformer resources"""
+    for transformer in transformers:
+        transformer.report()
+        transformer.close()
+    llm_cache = get_llm_cache()
+    if llm_cache:
+        print(llm_cache.report())
+    print(get_rate_limiter().report())
+
+    metrics = get_metrics()
+    metrics.write(textfile=args.metrics_textfile, json_path=args.metrics_json)
+    print(metrics.report())
+    if args.trace:
+        get_tracer().write(args.trace)
+        print(f"Wrote trace to: {args.trace}")
 
 if __name__ == "__main__":
     main()
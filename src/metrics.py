@@ -0,0 +1,225 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from tracing import get_tracer
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs"""
+        total, result = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket that contains it.
+
+        None when it lies above the largest bucket; JSON has no infinity.
+        """
+        if not self.count:
+            return 0.0
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return bound
+        return None
+
+class Timing:
+    """Elapsed seconds of a `Metrics.timer` block, set when the block exits"""
+    seconds: float = 0.0
+
+class Metrics:
+    """Thread-safe counters and latency histograms for one run.
+
+    Every pipeline stage (source, transformers, Elasticsearch write,
+    destination send) is recorded under `stage_calls_total`,
+    `stage_errors_total` and `stage_latency_seconds` labelled by stage.
+    Other components add their own counters, such as LLM tokens, bytes
+    fetched and cache lookups.
+    """
+
+    def __init__(self, namespace: str = 'hackerman'):
+        self.namespace = namespace
+        self.counters: Dict[str, Dict[Labels, float]] = defaultdict(lambda: defaultdict(float))
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self.lock:
+            self.counters[name][self._labels(labels)] += value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._labels(labels)
+        with self.lock:
+            histogram = self.histograms[name].get(key)
+            if histogram is None:
+                histogram = self.histograms[name][key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage: str, **span_args):
+        """Count a call to `stage`, its latency and whether it raised, and trace it as a span"""
+        timing = Timing()
+        start = time.perf_counter()
+        try:
+            with get_tracer().span(stage, **span_args):
+                yield timing
+        except Exception:
+            self.inc('stage_errors_total', stage=stage)
+            raise
+        finally:
+            timing.seconds = time.perf_counter() - start
+            self.inc('stage_calls_total', stage=stage)
+            self.observe('stage_latency_seconds', timing.seconds, stage=stage)
+
+    def counter(self, name: str, **labels) -> float:
+        with self.lock:
+            return self.counters.get(name, {}).get(self._labels(labels), 0)
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        def render_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{render_labels(labels)} {value:g}" for labels, value in sorted(series.items()))
+            for name, series in sorted(self.histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, total in histogram.cumulative():
+                        lines.append(f"{metric}_bucket{render_labels(labels, (('le', f'{bound:g}'),))} {total}")
+                    lines.append(f"{metric}_bucket{render_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{metric}_sum{render_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{render_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters and per-series histogram statistics as plain JSON-able data"""
+        def series_name(name: str, labels: Labels) -> str:
+            return name + (('{' + ','.join(f"{key}={value}" for key, value in labels) + '}') if labels else '')
+
+        with self.lock:
+            counters = {series_name(name, labels): value
+                        for name, series in self.counters.items() for labels, value in series.items()}
+            histograms = {
+                series_name(name, labels): {
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'p99': histogram.quantile(0.99),
+                }
+                for name, series in self.histograms.items() for labels, histogram in series.items()
+            }
+        return {'counters': dict(sorted(counters.items())), 'histograms': dict(sorted(histograms.items()))}
+
+    def write(self, textfile: Optional[str] = None, json_path: Optional[str] = None):
+        """Write the Prometheus textfile and/or JSON summary, replacing each file atomically"""
+        for path, content in ((textfile, self.to_prometheus),
+                              (json_path, lambda: json.dumps(self.summary(), indent=2))):
+            if not path:
+                continue
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            # The textfile collector may read at any moment, so never expose a partial file
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(content())
+            os.replace(tmp_path, path)
+
+    def report(self) -> str:
+        """One line per stage: calls, errors and latency"""
+        summary = self.summary()
+        lines = []
+        for name, stats in summary['histograms'].items():
+            if not name.startswith('stage_latency_seconds{'):
+                continue
+            stage = name[len('stage_latency_seconds{stage='):-1]
+            errors = summary['counters'].get(f"stage_errors_total{{stage={stage}}}", 0)
+            p95 = (f"p95 <= {stats['p95'] * 1000:g} ms" if stats['p95'] is not None
+                   else f"p95 > {LATENCY_BUCKETS[-1] * 1000:g} ms")
+            lines.append(f"  {stage}: {stats['count']} calls, {errors:g} errors, "
+                         f"mean {stats['mean'] * 1000:.0f} ms, {p95}")
+        return "Stage metrics:\n" + "\n".join(lines)
+
+def instrument(component: Any, method: str, stage: str = None, metrics: 'Metrics' = None):
+    """Wrap `component.method` in place so every call is timed under `stage`.
+
+    Dict results get the elapsed seconds added to their `timings` so
+    per-story stage timings travel with the story. Generator methods are
+    timed from the first item until they are exhausted.
+    """
+    stage = stage or type(component).__name__
+    original = getattr(component, method)
+
+    def get() -> Metrics:
+        return metrics or get_metrics()
+
+    if inspect.isgeneratorfunction(original):
+        @functools.wraps(original)
+        def wrapped_generator(*args, **kwargs):
+            with get().timer(stage):
+                yield from original(*args, **kwargs)
+        setattr(component, method, wrapped_generator)
+        return
+
+    @functools.wraps(original)
+    def wrapped(*args, **kwargs):
+        story = args[0].get('id') if args and isinstance(args[0], Mapping) else None
+        with get().timer(stage, story=story) as timing:
+            result = original(*args, **kwargs)
+        if isinstance(result, MutableMapping):
+            result.setdefault('timings', {})[stage] = round(timing.seconds, 4)
+        return result
+    setattr(component, method, wrapped)
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+def get_metrics() -> Metrics:
+    """Return the metrics registry shared by every component in the run"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -1,6 +1,8 @@
-from datetime import datetime
-from typing import List, Dict
-from elasticsearch_dsl import Document, Date, Text, Keyword, Float, Nested
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Mapping, Tuple, Set
+from elasticsearch.helpers import streaming_bulk
+from elasticsearch_dsl import Document, Date, Text, Keyword, Float, Integer, Nested, Object
+from elasticsearch_dsl.connections import connections
 
 class Article(Document):
     title = Text(fields={'keyword': Keyword()})
@@ -9,6 +11,8 @@ class Article(Document):
     links = Keyword(multi=True)
     created_at = Date()
     indexed_at = Date()
+    score = Integer()
+    comment_count = Integer()
     summary = Text()
     comment_summaries = Text(multi=True)
     tags = Nested(
@@ -17,6 +21,10 @@ class Article(Document):
             'score': Float()
         }
     )
+    # Seconds spent in each pipeline stage for this story, keyed by stage name
+    timings = Object()
+    # "Stage: message" for stages that fell back to a placeholder; a list so an update replaces it
+    errors = Keyword(multi=True)
     
     class Index:
         name = 'hackerman'
@@ -31,15 +39,125 @@ class Article(Document):
         return super().save(**kwargs)
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Article':
+    def from_dict(cls, data: Mapping[str, Any]) -> 'Article':
+        """Build the document from a Story or a plain story dict"""
         return cls(
+            # The HN item id makes repeated saves of a story idempotent
+            meta={'id': data.get('id')} if data.get('id') is not None else {},
             title=data.get('title'),
             content=data.get('content'),
             url=data.get('url'),
             created_at=data.get('created_at'),
+            score=data.get('score'),
+            comment_count=data.get('comment_count'),
             links=data.get('links', []),
             indexed_at=datetime.now(),
             summary=data.get('summary'),
             comment_summaries=data.get('comment_summaries', []),
-            tags=data.get('tags', [])
+            tags=data.get('tags', []),
+            timings=data.get('timings', {}),
+            errors=[f"{stage}: {message}" for stage, message in (data.get('errors') or {}).items()]
         )
+
+
+class ArticleWriter:
+    """Bulk, idempotent writer for Article documents.
+
+    Stories are upserted with their HN item id as the document id, so
+    re-running over the same stories updates them instead of duplicating
+    them. Index refresh is turned off while ingesting and restored after.
+    """
+
+    def __init__(self, chunk_size: int = 500, using: str = 'default'):
+        self.chunk_size = chunk_size
+        self.using = using
+
+    def _actions(self, stories: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+        for data in stories:
+            article = Article.from_dict(data)
+            yield {
+                '_op_type': 'update',
+                '_index': Article._index._name,
+                '_id': article.meta.id,
+                'doc': article.to_dict(skip_empty=False),
+                'doc_as_upsert': True
+            }
+
+    def refresh_stats(self, stories: Iterable[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Update only the score and comment count of already indexed stories"""
+        es = connections.get_connection(self.using)
+        actions = (
+            {
+                '_op_type': 'update',
+                '_index': Article._index._name,
+                '_id': data['id'],
+                'doc': {'score': data.get('score'), 'comment_count': data.get('comment_count')}
+            }
+            for data in stories
+        )
+        succeeded, failed = 0, []
+        for ok, item in streaming_bulk(es, actions, chunk_size=self.chunk_size,
+                                       raise_on_error=False, raise_on_exception=False):
+            if ok:
+                succeeded += 1
+            else:
+                failed.append(item)
+                result = item.get('update', {})
+                print(f"Error refreshing article {result.get('_id')}: {result.get('error')}")
+        return succeeded, failed
+
+    def write(self, stories: Iterable[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Upsert stories in chunks, returning the success count and per-item failures"""
+        es = connections.get_connection(self.using)
+        index = Article._index._name
+        Article.init(using=self.using)
+
+        settings = es.indices.get_settings(index=index)
+        refresh_interval = settings[index]['settings']['index'].get('refresh_interval')
+        es.indices.put_settings(index=index, settings={'index': {'refresh_interval': '-1'}})
+
+        succeeded, failed = 0, []
+        try:
+            for ok, item in streaming_bulk(es, self._actions(stories), chunk_size=self.chunk_size,
+                                           raise_on_error=False, raise_on_exception=False):
+                if ok:
+                    succeeded += 1
+                else:
+                    failed.append(item)
+                    result = item.get('update', {})
+                    print(f"Error indexing article {result.get('_id')}: {result.get('error')}")
+        finally:
+            # None restores the index default
+            es.indices.put_settings(index=index, settings={'index': {'refresh_interval': refresh_interval}})
+            es.indices.refresh(index=index)
+
+        return succeeded, failed
+
+
+def find_processed(ids: List[Any], reprocess_after_hours: float, using: str = 'default') -> Set[Any]:
+    """Return the ids indexed within the last `reprocess_after_hours`, using a single mget.
+
+    Stories indexed with a stage error are left out, so they are processed again.
+    """
+    if not ids:
+        return set()
+    try:
+        es = connections.get_connection(using)
+        if not es.indices.exists(index=Article._index._name):
+            return set()
+        response = es.mget(index=Article._index._name, ids=[str(i) for i in ids], source=['indexed_at', 'errors'])
+    except Exception as e:
+        # Without the index we cannot tell, so process everything
+        print(f"Error looking up processed stories: {str(e)}")
+        return set()
+
+    cutoff = datetime.now() - timedelta(hours=reprocess_after_hours)
+    recent = set()
+    for item_id, doc in zip(ids, response['docs']):
+        source = doc.get('_source', {}) if doc.get('found') else {}
+        indexed_at = source.get('indexed_at')
+        if source.get('errors'):
+            continue
+        if indexed_at and datetime.fromisoformat(indexed_at).replace(tzinfo=None) >= cutoff:
+            recent.add(item_id)
+    return recent
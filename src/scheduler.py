@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from tqdm import tqdm
+
+from transformers.pipeline import TransformerPipeline
+from story import Story, as_story
+from metrics import get_metrics
+
+def by_score(story: Story) -> float:
+    """Pipeline priority that processes the highest scored stories first"""
+    return -(story.get('score') or 0)
+
+def degraded_copy(story: Story) -> Story:
+    """A digest entry with the story's title and link but none of the pipeline's output"""
+    return Story(id=story.id, title=story.title, url=story.url, by=story.by, created_at=story.created_at,
+                 score=story.score, comment_count=story.comment_count, degraded=True)
+
+class DeadlineScheduler:
+    """Run stories through the pipeline highest score first and stop waiting at a deadline.
+
+    `run` returns the stories finished by `deadline` seconds after `started`
+    (the scheduler's creation by default). Stories still in flight keep
+    going in a background thread; `stragglers` waits for them so they can
+    still be indexed. Without a deadline `run` waits for every story.
+    """
+
+    def __init__(self, pipeline: TransformerPipeline, deadline: Optional[float] = None,
+                 started: Optional[float] = None, priority: Callable[[Story], Any] = by_score):
+        self.pipeline = pipeline
+        self.deadline = deadline
+        self.started = time.monotonic() if started is None else started
+        self.priority = priority
+        self.condition = threading.Condition()
+        # Degraded copies of every story fed to the pipeline, by input index
+        self.fed: Dict[int, Story] = {}
+        self.results: List[Tuple[int, Story]] = []
+        # Input indices the pipeline dropped after a transformer error; they will never finish
+        self.dropped: Set[int] = set()
+        self.finished = False
+        # Number of results handed out by run(); later ones are stragglers
+        self.taken = 0
+        self.thread: Optional[threading.Thread] = None
+
+    def _feed(self, items: Iterable[Dict[str, Any]]) -> Iterator[Story]:
+        # The pipeline numbers items in the order it reads them, as this does
+        for index, item in enumerate(items):
+            story = as_story(item)
+            # Copied before any transformer starts changing the story in place
+            copy = degraded_copy(story)
+            with self.condition:
+                self.fed[index] = copy
+            yield story
+
+    def _drop(self, index: int):
+        with self.condition:
+            self.dropped.add(index)
+
+    def _consume(self, items: Iterable[Dict[str, Any]]):
+        try:
+            with tqdm(desc="Processing stories") as pbar:
+                for index, story in self.pipeline.stream(self._feed(items), priority=self.priority,
+                                                         on_drop=self._drop):
+                    with self.condition:
+                        self.results.append((index, story))
+                    pbar.set_postfix_str(f"Processed: {(story.title or '')[:30]}...")
+                    pbar.update(1)
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> Tuple[List[Story], List[Story]]:
+        """Process `items` until done or the deadline, returning (finished, unfinished) in input order.
+
+        Unfinished stories are degraded copies; the list is empty when
+        everything finished in time. Stories the pipeline dropped after a
+        transformer error are in neither list.
+        """
+        self.thread = threading.Thread(target=self._consume, args=(items,), name="scheduler", daemon=True)
+        self.thread.start()
+
+        with self.condition:
+            if self.deadline is None:
+                self.condition.wait_for(lambda: self.finished)
+            else:
+                remaining = self.started + self.deadline - time.monotonic()
+                self.condition.wait_for(lambda: self.finished, timeout=max(0.0, remaining))
+            self.taken = len(self.results)
+            finished = sorted(self.results, key=lambda entry: entry[0])
+            if self.finished:
+                return [story for _, story in finished], []
+            # Stories the pipeline dropped after an error are not late
+            done = {index for index, _ in finished} | self.dropped
+            unfinished = [copy for index, copy in sorted(self.fed.items()) if index not in done]
+
+        get_metrics().inc('deadline_missed_total', len(unfinished))
+        print(f"Deadline of {self.deadline:g}s passed with {len(finished)} stories finished "
+              f"and {len(unfinished)} still in progress")
+        return [story for _, story in finished], unfinished
+
+    def stragglers(self, timeout: Optional[float] = None) -> List[Story]:
+        """Wait for the stories that missed the deadline and return those that finished"""
+        if self.thread:
+            self.thread.join(timeout)
+        with self.condition:
+            late = self.results[self.taken:]
+            self.taken = len(self.results)
+        return [story for _, story in sorted(late, key=lambda entry: entry[0])]
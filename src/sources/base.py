@@ -1,8 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Set
 
 class DataSource(ABC):
     @abstractmethod
     def fetch_data(self) -> List[Dict[str, Any]]:
         """Fetch data from the source"""
         pass
+
+    def stream_data(self, skip_ids: Callable[[List[Any]], Set[Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield items as they are fetched; sources that can stream override this.
+
+        `skip_ids` maps candidate ids to those already processed; such items
+        are yielded with `refresh_only` set so callers can skip the pipeline.
+        """
+        items = self.fetch_data()
+        known = skip_ids([item['id'] for item in items]) if skip_ids else set()
+        for item in items:
+            if item['id'] in known:
+                item['refresh_only'] = True
+            yield item
+
+    def stream_updates(self, skip_ids: Callable[[List[Any]], Set[Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield items that are new or changed since the previous call, for long-running polling.
+
+        Sources without a change feed yield everything again, with items
+        `skip_ids` reports as processed marked `refresh_only`.
+        """
+        return self.stream_data(skip_ids=skip_ids)
+
+    def retry(self, ids: Iterable[Any]):
+        """Offer these items again on the next `stream_updates`, after the caller failed to process them"""
+        pass
@@ -0,0 +1,76 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Callable, Optional
+
+class CommentCrawler:
+    """Breadth-first, parallel crawler for a story's comment tree.
+
+    The crawl starts from the story's `kids` (already fetched with the story)
+    and stops at whichever budget runs out first: depth, breadth per node,
+    total comments or wall-clock time.
+    """
+
+    def __init__(self, fetch_item: Callable[[int], Optional[Dict[str, Any]]],
+                 max_depth: int = 1, max_breadth: int = 10, max_comments: int = 50,
+                 time_budget: float = 5.0, max_workers: int = 8):
+        self.fetch_item = fetch_item
+        self.max_depth = max_depth
+        self.max_breadth = max_breadth
+        self.max_comments = max_comments
+        self.time_budget = time_budget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _fetch(self, item_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            return self.fetch_item(item_id)
+        except Exception as e:
+            print(f"Error fetching comment {item_id}: {str(e)}")
+            print("Traceback:")
+            traceback.print_exc()
+            return None
+
+    def crawl(self, kids: List[int]) -> List[str]:
+        """Return comment texts in breadth-first order within the configured budgets"""
+        deadline = time.monotonic() + self.time_budget
+        comments = []
+        frontier = list(kids or [])[:self.max_breadth]
+        depth = 1
+
+        while frontier and depth <= self.max_depth and len(comments) < self.max_comments:
+            # Never request more nodes than the remaining total budget
+            frontier = frontier[:self.max_comments - len(comments)]
+            futures = [self.executor.submit(self._fetch, kid_id) for kid_id in frontier]
+
+            # Wait for the level, but never past the wall-clock budget
+            pending = set(futures)
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in pending:
+                future.cancel()
+
+            next_frontier = []
+            # Iterate in submission order so siblings keep their HN ranking
+            for future in futures:
+                if not future.done() or future.cancelled():
+                    continue
+                comment = future.result()
+                if not comment or comment.get('deleted') or comment.get('dead'):
+                    continue
+                if comment.get('text'):
+                    comments.append(comment['text'])
+                next_frontier.extend(comment.get('kids', [])[:self.max_breadth])
+
+            if pending:
+                break  # Out of time
+            frontier = next_frontier
+            depth += 1
+
+        return comments[:self.max_comments]
+
+    def close(self):
+        """Release the crawler's worker threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
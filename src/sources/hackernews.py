@@ -1,70 +1,282 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Set, Tuple
+import sys
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from hn_sdk.client.v0.client import get_item_by_id, get_top_stories, get_best_stories
+from http_client import get_http_client
+from metrics import get_metrics
+from story import Story
 from .base import DataSource
+from .comments import CommentCrawler
+
+HN_API_URL = "https://hacker-news.firebaseio.com/v0"
 
 class HackerNewsSource(DataSource):
-    def __init__(self):
-        pass
+    def __init__(self, limit: int = 25, concurrent: bool = True, max_workers: int = 8,
+                 timeout: float = 10, fetch_comments: bool = True, comments: Dict[str, Any] = None,
+                 api_url: str = HN_API_URL):
+        self.limit = limit
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.fetch_comments = fetch_comments
+        # Comment crawl budgets: max_depth, max_breadth, max_comments, time_budget, max_workers
+        self.comment_args = comments or {}
+        self.crawler = None
+        self.http = get_http_client()
+        self.api_url = api_url.rstrip('/')
+        # State for stream_updates: story ids on the list already handled, last maxitem and updated item ids
+        self.seen: Optional[Set[int]] = None
+        # Story ids whose fetch raised during stream_updates, which offers them again
+        self.failed: Optional[Set[int]] = None
+        self.max_item = None
+        self.updated: Set[int] = set()
+        # Progress of stream_backfill: lowest item id and number of ids scanned
+        self.position: Optional[int] = None
+        self.scanned = 0
+
+    def _get(self, path: str) -> Any:
+        """GET a Hacker News API path over the shared connection pool"""
+        response = self.http.get(f"{self.api_url}/{path}.json", timeout=(self.http.connect_timeout, self.timeout))
+        response.raise_for_status()
+        get_metrics().inc('bytes_fetched_total', len(response.content), source='hackernews')
+        return response.json()
+
+    def _get_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch a single item with a per-request timeout"""
+        return self._get(f"item/{item_id}")
 
-    def _get_comments(self, story_id: int) -> List[str]:
-        """Fetch and extract comments for a story"""
-        comments = []
+    def _get_comments(self, story: Dict[str, Any]) -> List[str]:
+        """Crawl comments for a story, reusing the `kids` from the story fetch"""
+        if not self.crawler or not story.get('kids'):
+            return []
         try:
-            story = get_item_by_id(story_id)
-            if story and 'kids' in story:
-                for kid_id in story['kids'][:10]:  # Limit to top 10 comments
-                    try:
-                        comment = get_item_by_id(kid_id)
-                        if comment and 'text' in comment:
-                            comments.append(comment['text'])
-                    except Exception as e:
-                        print(f"Error fetching comment {kid_id}: {str(e)}")
-                        print("Traceback:")
-                        traceback.print_exc()
+            return self.crawler.crawl(story['kids'])
         except Exception as e:
-            print(f"Error processing comments for story {story_id}: {str(e)}")
+            print(f"Error processing comments for story {story.get('id')}: {str(e)}")
             print("Traceback:")
             traceback.print_exc()
-        return comments
+            return []
 
-    def fetch_data(self) -> List[Dict[str, Any]]:
-        """Fetch top stories from Hacker News"""
-        stories = []
+    def _fetch_story(self, story_id: int, refresh_only: bool = False,
+                     item: Dict[str, Any] = None) -> Optional[Story]:
+        """Fetch a story, recording how long it took in the story's `timings`"""
+        with get_metrics().timer('hackernews_story', story=story_id) as timing:
+            story = self._load_story(story_id, refresh_only, item)
+        if story:
+            story['timings'] = {'hackernews_story': round(timing.seconds, 4)}
+        return story
+
+    def _load_story(self, story_id: int, refresh_only: bool = False,
+                    item: Dict[str, Any] = None) -> Optional[Story]:
+        """Fetch a story's details, returning None for stories without a URL.
+
+        `item` is the already fetched HN item, when the caller has it.
+        """
+        try:
+            story = item or self._get_item(story_id)
+            if story and story.get('url'):  # Only process stories with URLs
+                # Get comments, unless the story only needs its stats refreshed
+                comments = [] if refresh_only else self._get_comments(story)
+
+                # Convert Unix timestamp to datetime
+                created_at = datetime.fromtimestamp(story['time']) if story.get('time') else None
+
+                return Story(
+                    title=story.get('title', ''),
+                    url=story['url'],
+                    id=story_id,
+                    created_at=created_at,
+                    score=story.get('score', 0),
+                    # The same few thousand authors post most stories
+                    by=sys.intern(story.get('by', '')),
+                    comment_count=story.get('descendants', 0),
+                    comments=comments,
+                    refresh_only=True if refresh_only else None
+                )
+        except Exception as e:
+            print(f"Error processing story {story_id}: {str(e)}")
+            if self.failed is not None:
+                self.failed.add(story_id)
+            print("Traceback:")
+            traceback.print_exc()
+        return None
+
+    def _stream_stories(self, story_ids: List[int], known: Set[int]) -> Iterator[Story]:
+        """Fetch stories in the given order; ids in `known` are fetched for their stats only"""
+        crawler = self.crawler = CommentCrawler(self._get_item, **self.comment_args) if self.fetch_comments else None
+        try:
+            # Fetch each story's details, concurrently unless disabled
+            if self.concurrent and len(story_ids) > 1:
+                workers = max(1, min(self.max_workers, len(story_ids)))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(self._fetch_story, story_id, story_id in known)
+                        for story_id in story_ids
+                    ]
+                    # Waiting in submission order preserves the ranking
+                    for future in futures:
+                        story = future.result()
+                        if story:
+                            yield story
+            else:
+                for story_id in story_ids:
+                    story = self._fetch_story(story_id, story_id in known)
+                    if story:
+                        yield story
+        finally:
+            if crawler:
+                crawler.close()
+                # An abandoned stream may finish after a newer one has started its own crawler
+                if self.crawler is crawler:
+                    self.crawler = None
+
+    def stream_data(self, skip_ids: Callable[[List[Any]], Set[Any]] = None) -> Iterator[Story]:
+        """Yield top stories from Hacker News in ranking order as soon as each is fetched"""
         try:
             # Get top story IDs
-            top_story_ids = get_best_stories()[:25]
-            
-            # Fetch each story's details
-            for story_id in top_story_ids:
-                try:
-                    print("Fetching story", story_id)
-                    story = get_item_by_id(story_id)
-                    if story and story.get('url'):  # Only process stories with URLs
-                        # Get comments
-                        #comments = self._get_comments(story_id)
-                        comments = []
-                        
-                        # Convert Unix timestamp to datetime
-                        created_at = datetime.fromtimestamp(story['time']) if story.get('time') else None
-                        
-                        stories.append({
-                            'title': story.get('title', ''),
-                            'url': story['url'],
-                            'id': story_id,
-                            'created_at': created_at,
-                            'score': story.get('score', 0),
-                            'by': story.get('by', ''),
-                            'comments': comments
-                        })
-                except Exception as e:
-                    print(f"Error processing story {story_id}: {str(e)}")
-                    print("Traceback:")
-                    traceback.print_exc()
+            top_story_ids = self._get("beststories")[:self.limit]
+
+            # Stories processed recently are only fetched for their current stats
+            known = skip_ids(top_story_ids) if skip_ids else set()
+
+            yield from self._stream_stories(top_story_ids, known)
         except Exception as e:
             print(f"Error fetching top stories: {str(e)}")
             print("Traceback:")
             traceback.print_exc()
-        
-        return stories
+
+    def stream_updates(self, skip_ids: Callable[[List[Any]], Set[Any]] = None) -> Iterator[Story]:
+        """Yield only stories that are new to the list or changed since the last poll.
+
+        `maxitem` and `updates` are checked first; when neither moved since
+        the previous poll the story list is not fetched at all. Stories
+        already seen that appear in `updates` are yielded with
+        `refresh_only` set. A story counts as seen only once the stream has
+        run to the end without its fetch failing; `retry` forgets stories
+        the caller could not process.
+        """
+        try:
+            max_item = self._get("maxitem")
+            updated = set(self._get("updates").get('items', []))
+            if self.seen is not None and max_item == self.max_item and updated == self.updated:
+                return
+
+            top_story_ids = self._get("beststories")[:self.limit]
+            seen = self.seen or set()
+            new_ids = [story_id for story_id in top_story_ids if story_id not in seen]
+            changed = {story_id for story_id in top_story_ids if story_id in seen and story_id in updated}
+            # Stories indexed before a restart are not new work either
+            known = (skip_ids(new_ids) if skip_ids and new_ids else set()) | changed
+            # Forget stories that left the list so the set stays bounded
+            self.seen = {story_id for story_id in top_story_ids if story_id in seen}
+
+            story_ids = [story_id for story_id in top_story_ids if story_id not in seen or story_id in changed]
+            self.failed = set()
+            try:
+                yield from self._stream_stories(story_ids, known)
+                self.seen.update(story_id for story_id in story_ids if story_id not in self.failed)
+                # With failures left over, the next poll must not be skipped as unchanged
+                self.max_item = None if self.failed else max_item
+                self.updated = updated
+            finally:
+                self.failed = None
+        except Exception as e:
+            print(f"Error polling for updates: {str(e)}")
+            print("Traceback:")
+            traceback.print_exc()
+
+    def retry(self, ids: Iterable[Any]):
+        self.seen = (self.seen or set()) - set(ids)
+        # Poll the list again even if nothing changed on Hacker News
+        self.max_item = None
+
+    def _find_id_at(self, timestamp: float, high: int) -> int:
+        """Binary search for the first item id posted at or after `timestamp`.
+
+        Item ids increase with posting time, so a few dozen item fetches
+        locate a date anywhere in the archive.
+        """
+        low = 1
+        while low < high:
+            middle = (low + high) // 2
+            # Deleted items may have no time; probe the next few ids instead
+            item_time = None
+            for probe in range(middle, min(middle + 5, high + 1)):
+                item = self._get_item(probe)
+                if item and item.get('time'):
+                    item_time = item['time']
+                    break
+            if item_time is None or item_time < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def resolve_range(self, start_id: int = None, stop_id: int = None, since: datetime = None,
+                      until: datetime = None) -> Tuple[int, int]:
+        """Turn optional id and date bounds into the (highest, lowest) item ids to walk"""
+        if start_id is None:
+            max_item = self._get("maxitem")
+            start_id = self._find_id_at(until.timestamp(), max_item) if until else max_item
+        if stop_id is None:
+            stop_id = self._find_id_at(since.timestamp(), start_id) if since else 1
+        return start_id, stop_id
+
+    def stream_backfill(self, start_id: int = None, stop_id: int = None, since: datetime = None,
+                        until: datetime = None, batch_size: int = None,
+                        skip_ids: Callable[[List[Any]], Set[Any]] = None) -> Iterator[Story]:
+        """Walk item ids downward and yield every story with a URL, newest first.
+
+        The walk starts at `start_id` (or the first id after `until`, or
+        `maxitem`) and ends at `stop_id` (or the first id at `since`, or 1).
+        Only `batch_size` items are in flight at a time, so memory does not
+        grow with the size of the range. `self.position` is the lowest id
+        scanned so far and `self.scanned` the number of ids scanned.
+        """
+        start_id, stop_id = self.resolve_range(start_id, stop_id, since, until)
+        batch_size = batch_size or self.max_workers * 4
+        self.position, self.scanned = start_id, 0
+
+        crawler = self.crawler = CommentCrawler(self._get_item, **self.comment_args) if self.fetch_comments else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for high in range(start_id, stop_id - 1, -batch_size):
+                    ids = list(range(high, max(stop_id, high - batch_size + 1) - 1, -1))
+                    # Most items are comments, so fetch every item once and only build stories
+                    items = executor.map(self._get_item_safely, ids)
+                    stories = [
+                        item for item in items
+                        if item and item.get('type') == 'story' and item.get('url')
+                        and not item.get('deleted') and not item.get('dead')
+                        and (not since or item.get('time', 0) >= since.timestamp())
+                        and (not until or item.get('time', 0) < until.timestamp())
+                    ]
+                    known = skip_ids([item['id'] for item in stories]) if skip_ids and stories else set()
+                    futures = [
+                        executor.submit(self._fetch_story, item['id'], item['id'] in known, item)
+                        for item in stories
+                    ]
+                    for future in futures:
+                        story = future.result()
+                        if story:
+                            yield story
+                    self.position = ids[-1]
+                    self.scanned += len(ids)
+        finally:
+            if crawler:
+                crawler.close()
+                # An abandoned stream may finish after a newer one has started its own crawler
+                if self.crawler is crawler:
+                    self.crawler = None
+
+    def _get_item_safely(self, item_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            return self._get_item(item_id)
+        except Exception as e:
+            print(f"Error fetching item {item_id}: {str(e)}")
+            return None
+
+    def fetch_data(self) -> List[Story]:
+        """Fetch top stories from Hacker News"""
+        return list(self.stream_data())
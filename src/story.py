@@ -0,0 +1,123 @@
+from collections.abc import Mapping, MutableMapping
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+@dataclass(slots=True, eq=False)
+class Story(MutableMapping):
+    """One story as it moves from the source through the transformers to Elasticsearch.
+
+    Known fields live in slots instead of a per-story dict. The class is
+    also a mutable mapping over those fields, so transformers written
+    against plain dicts (`data['summary'] = ...`, `data.get('content')`)
+    keep working unchanged. A field set to None counts as a missing key;
+    keys that are not fields go to a lazily created `extra` dict.
+
+    The record is for typed access, not memory: content, links and
+    comments are held as they are, so at backfill scale a Story takes only
+    a few percent less than the dict it replaces, and mapping-style `get`
+    is slower than a dict's.
+    """
+    id: Optional[int] = None
+    title: Optional[str] = None
+    url: Optional[str] = None
+    by: Optional[str] = None
+    created_at: Optional[datetime] = None
+    score: Optional[int] = None
+    comment_count: Optional[int] = None
+    comments: Optional[List[str]] = None
+    content: Optional[str] = None
+    links: Optional[List[str]] = None
+    summary: Optional[str] = None
+    comment_summaries: Optional[List[str]] = None
+    tags: Optional[List[Dict[str, Any]]] = None
+    timings: Optional[Dict[str, float]] = None
+    refresh_only: Optional[bool] = None
+    # Delivered before the pipeline finished it because the digest deadline passed
+    degraded: Optional[bool] = None
+    # Error messages by transformer, for stages that fell back to a placeholder result
+    errors: Optional[Dict[str, str]] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Story':
+        """Build a story from a dict, keeping unknown keys in `extra`"""
+        story = cls()
+        for key, value in data.items():
+            story[key] = value
+        return story
+
+    def record_error(self, stage: str, error: Any):
+        """Note that `stage` failed, so its placeholder output is not treated as a result"""
+        if self.errors is None:
+            self.errors = {}
+        self.errors[stage] = str(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def copy(self) -> 'Story':
+        return Story.from_dict(self)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELD_SET:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Mapping.get goes through __getitem__ and KeyError; this is the hot path
+        if key in FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __setitem__(self, key: str, value: Any):
+        if key in FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in FIELD_SET:
+            if getattr(self, key) is None:
+                raise KeyError(key)
+            setattr(self, key, None)
+        elif self.extra is not None:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in FIELD_SET:
+            return getattr(self, key) is not None
+        return bool(self.extra) and key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        for name in FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Story(id={self.id!r}, title={self.title!r})"
+
+# Mapping keys backed by slots; `extra` itself is not a key
+FIELDS = tuple(field.name for field in fields(Story) if field.name != 'extra')
+FIELD_SET = frozenset(FIELDS)
+
+def as_story(data: Any) -> Any:
+    """Convert a dict to a Story; Stories and anything else pass through unchanged"""
+    if isinstance(data, dict):
+        return Story.from_dict(data)
+    return data
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+def _now_us() -> float:
+    # CLOCK_MONOTONIC is shared by every process on the machine, so spans
+    # recorded in worker processes line up with the parent's
+    return time.monotonic_ns() / 1000
+
+def _span_event(name: str, start_us: float, args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'name': name, 'cat': 'pipeline', 'ph': 'X',
+        'ts': start_us, 'dur': _now_us() - start_us,
+        'pid': os.getpid(), 'tid': threading.get_native_id(),
+        'args': args,
+    }
+
+class Tracer:
+    """Records spans as Chrome trace events for Perfetto or chrome://tracing.
+
+    Spans opened inside another span on the same thread inherit its
+    `story` argument, so LLM calls and parsing line up with the story
+    being transformed. When disabled, `span` does nothing.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events: List[Dict[str, Any]] = []
+        self.threads: Dict[Tuple[int, int], str] = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def add(self, event: Dict[str, Any], thread_name: str = None):
+        """Add a finished event, e.g. one recorded in a worker process"""
+        with self.lock:
+            self.events.append(event)
+            self.threads.setdefault((event['pid'], event['tid']), thread_name or f"thread-{event['tid']}")
+
+    @contextmanager
+    def span(self, name: str, **args):
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        if stack and 'story' in stack[-1] and args.get('story') is None:
+            args['story'] = stack[-1]['story']
+        args = {key: value for key, value in args.items() if value is not None}
+        stack.append(args)
+        start = _now_us()
+        try:
+            yield
+        finally:
+            stack.pop()
+            self.add(_span_event(name, start, args), threading.current_thread().name)
+
+    def current_args(self) -> Dict[str, Any]:
+        """Arguments of the innermost open span on this thread"""
+        stack = getattr(self.local, 'stack', None)
+        return dict(stack[-1]) if stack else {}
+
+    def to_chrome(self) -> Dict[str, Any]:
+        with self.lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+            metadata = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                for (pid, tid), name in self.threads.items()
+            ]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome(), f)
+
+def traced_call(name: str, args: Dict[str, Any], fn: Callable, *fn_args) -> Tuple[Any, Dict[str, Any]]:
+    """Run `fn` and return its result with a span event for the call.
+
+    Meant to be submitted to a process pool: the event carries the worker's
+    pid and tid, and the parent adds it with `Tracer.add`.
+    """
+    start = _now_us()
+    result = fn(*fn_args)
+    return result, _span_event(name, start, args)
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def configure_tracing(enabled: bool):
+    """Turn span recording on or off for the shared tracer"""
+    get_tracer().enabled = enabled
+
+def get_tracer() -> Tracer:
+    """Return the tracer shared by every component in the run"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
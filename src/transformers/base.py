@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from story import Story
 
 class Transformer(ABC):
+    # Number of worker threads for this transformer's stage in a streaming pipeline
+    workers: int = 1
+
     @abstractmethod
-    def transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform a single piece of data"""
+    def transform(self, data: Story) -> Story:
+        """Transform a single story.
+
+        Stories also behave as mutable mappings, so transformers that read
+        and assign keys, or return a new dict, keep working.
+        """
+        pass
+
+    def report(self):
+        """Print end-of-run statistics, if the transformer keeps any"""
+        pass
+
+    def close(self):
+        """Release resources such as worker pools at the end of the run"""
         pass
@@ -1,39 +1,95 @@
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
-from langchain.schema.messages import HumanMessage
+from typing import Dict, List, Set, Tuple
+from story import Story
 from .base import Transformer
+from .llm import create_llm, invoke, estimate_tokens, parse_json_response
 
 class CommentSummarizer(Transformer):
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model_name="gpt-3.5-turbo",
-            temperature=0,
-        )
+    PROMPT_VERSION = 'comment-summary-v1'
+    BATCH_PROMPT_VERSION = 'comment-summary-batch-v1'
 
-    def transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self, batch: bool = True, max_batch_tokens: int = 3000):
+        self.llm = create_llm()
+        self.batch = batch
+        self.max_batch_tokens = max_batch_tokens
+
+    def _summarize_one(self, comment: str) -> str:
+        prompt = f"Please provide a brief 1-2 sentence summary of this Hacker News comment:\n\n{comment}"
+
+        return invoke(self.llm, prompt, self.PROMPT_VERSION).strip()
+
+    def _chunk(self, comments: List[str]) -> List[List[Tuple[int, str]]]:
+        """Pack numbered comments into batches that fit the token budget"""
+        batches, current, current_tokens = [], [], 0
+        for index, comment in enumerate(comments, start=1):
+            tokens = estimate_tokens(comment)
+            if current and current_tokens + tokens > self.max_batch_tokens:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((index, comment))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _summarize_batch(self, batch: List[Tuple[int, str]]) -> Dict[int, str]:
+        """Summarize a batch of comments in one request; unparseable entries are left out"""
+        numbered = "\n\n".join(f"[{index}] {comment}" for index, comment in batch)
+        prompt = f"""Please provide a brief 1-2 sentence summary of each of the following Hacker News comments.
+Return a JSON object of the form {{"summaries": [{{"index": 1, "summary": "..."}}]}} with one entry per comment, using the comment's number as its index.
+
+{numbered}"""
+
+        expected = {index for index, _ in batch}
+        # A reply missing summaries is used for what it has, but not cached
+        response = invoke(self.llm, prompt, self.BATCH_PROMPT_VERSION, json_mode=True,
+                          validate=lambda text: len(self._parse_batch(text, expected)) == len(expected))
+        summaries = self._parse_batch(response, expected)
+        if not summaries:
+            print("Error parsing batched comment summaries, falling back to per-comment calls")
+        return summaries
+
+    @staticmethod
+    def _parse_batch(text: str, expected: Set[int]) -> Dict[int, str]:
+        """Read the per-comment summaries out of a batch reply; unparseable entries are left out"""
+        try:
+            response = parse_json_response(text)
+        except ValueError:
+            return {}
+
+        summaries = {}
+        for entry in response.get('summaries', []) if isinstance(response, dict) else []:
+            try:
+                index = int(entry['index'])
+                summary = str(entry['summary']).strip()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if index in expected and summary:
+                summaries[index] = summary
+        return summaries
+
+    def transform(self, data: Story) -> Story:
         """Summarize comments from the article"""
         try:
-            if not data.get('comments'):
-                data['comment_summaries'] = []
+            if not data.comments:
+                data.comment_summaries = []
+                return data
+
+            comments = [comment for comment in data.comments if comment]
+            if not self.batch:
+                data.comment_summaries = [self._summarize_one(comment) for comment in comments]
                 return data
 
-            summaries = []
-            for comment in data['comments']:
-                if not comment:
-                    continue
-
-                messages = [
-                    HumanMessage(
-                        content=f"Please provide a brief 1-2 sentence summary of this Hacker News comment:\n\n{comment}"
-                    )
-                ]
-                
-                response = self.llm.invoke(messages)
-                summaries.append(response.content.strip())
-            
-            data['comment_summaries'] = summaries
+            # One request per batch, then per-comment calls only for entries that failed to parse
+            summaries = {}
+            for batch in self._chunk(comments):
+                summaries.update(self._summarize_batch(batch))
+            data.comment_summaries = [
+                summaries.get(index) or self._summarize_one(comment)
+                for index, comment in enumerate(comments, start=1)
+            ]
             return data
         except Exception as e:
             print(f"Error summarizing comments: {str(e)}")
-            data['comment_summaries'] = []
+            data.record_error(type(self).__name__, e)
+            data.comment_summaries = []
             return data
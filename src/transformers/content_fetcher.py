@@ -1,46 +1,117 @@
-from typing import Dict, Any, List
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from cache.http import HTTPCache
+from http_client import get_http_client
+from metrics import get_metrics
+from story import Story
+from tracing import get_tracer, traced_call
 from .base import Transformer
+from .extractors import EXTRACTION_VERSION, extract, get_extractor
+from .token_budget import TokenBudget
+
+# Content types worth downloading; anything else (PDFs, images, archives) is skipped
+TEXT_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
 
 class ContentFetcher(Transformer):
-    def transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self, cache: bool = True, cache_path: str = '.cache/http.sqlite',
+                 cache_ttl: int = 3600, cache_max_mb: int = 100, max_tokens: int = 1000,
+                 extractor: str = 'bs4', max_bytes: int = 2 * 1024 * 1024, parse_workers: int = 0):
+        self.cache = HTTPCache(cache_path, ttl=cache_ttl, max_bytes=cache_max_mb * 1024 * 1024,
+                               namespace=f"{extractor}-v{EXTRACTION_VERSION}") if cache else None
+        # Replaces the fixed 4000-character truncation
+        self.budget = TokenBudget(max_tokens, baseline_chars=4000)
+        self.extractor = extractor
+        get_extractor(extractor)
+        self.max_bytes = max_bytes
+        self.http = get_http_client()
+        # Parsing is CPU-bound and holds the GIL, so optionally move it to other processes
+        self.parse_pool = ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        ) if parse_workers > 0 else None
+
+    def _download(self, response: requests.Response) -> Tuple[bytes, str]:
+        """Read at most max_bytes of a streamed response, skipping non-text content"""
+        content_type = response.headers.get('Content-Type', '')
+        if content_type and content_type.split(';')[0].strip().lower() not in TEXT_CONTENT_TYPES:
+            raise ValueError(f"Skipped unsupported content type: {content_type}")
+
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                break
+
+        get_metrics().inc('bytes_fetched_total', min(size, self.max_bytes), source='content')
+        charset = re.search(r'charset=["\']?([\w-]+)', content_type, re.IGNORECASE)
+        return b''.join(chunks)[:self.max_bytes], charset.group(1) if charset else None
+
+    def _fetch(self, url: str) -> Tuple[str, List[str]]:
+        """Fetch a page, serving fresh cache hits and revalidating stale entries"""
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry['fresh']:
+            self.cache.record('hits')
+            return entry['content'], entry['links']
+
+        headers = self.cache.conditional_headers(entry) if entry else {}
+        # Hold the host's slot until the streamed body has been read
+        with self.http.limit(url):
+            # Closing returns the pooled connection even when the status or the download raises
+            with self.http.get(url, headers=headers, stream=True) as response:
+                if entry and response.status_code == 304:
+                    self.cache.record('revalidations')
+                    self.cache.touch(url)
+                    return entry['content'], entry['links']
+                response.raise_for_status()
+
+                body, encoding = self._download(response)
+
+        tracer = get_tracer()
+        if self.parse_pool:
+            # Only the raw bytes go out and only the compact (text, links) result comes back
+            (content, links), event = self.parse_pool.submit(
+                traced_call, 'parse', tracer.current_args(), extract, body, url, self.extractor, encoding
+            ).result()
+            if tracer.enabled:
+                tracer.add(event, 'parse-worker')
+        else:
+            with tracer.span('parse'):
+                content, links = extract(body, url, self.extractor, encoding)
+        if self.cache:
+            self.cache.record('misses')
+            self.cache.put(url, content, links,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+        return content, links
+
+    def transform(self, data: Story) -> Story:
         """Fetch content and extract links from the URL"""
         try:
-            response = requests.get(data['url'], timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract all links
-            links = []
-            for link in soup.find_all('a'):
-                href = link.get('href')
-                if href:
-                    # Convert relative URLs to absolute
-                    absolute_url = urljoin(data['url'], href)
-                    links.append(absolute_url)
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text content
-            text = soup.get_text()
-            
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            content = ' '.join(chunk for chunk in chunks if chunk)
-            
-            # Truncate content to avoid token limits
-            content = content[:4000]
-            
-            data['content'] = content
-            data['links'] = list(set(links))  # Remove duplicates
+            content, links = self._fetch(data.url)
+
+            # Keep the most informative paragraphs within the token budget
+            content = self.budget.apply(content, data.title or '')
+
+            data.content = content
+            data.links = links
             return data
         except Exception as e:
-            data['content'] = f"Error fetching content: {str(e)}"
-            data['links'] = []
+            get_metrics().inc('content_fetch_errors_total')
+            data.record_error(type(self).__name__, e)
+            data.content = f"Error fetching content: {str(e)}"
+            data.links = []
             return data
+
+    def report(self):
+        if self.cache:
+            print(self.cache.report())
+        print(self.budget.report('ContentFetcher'))
+
+    def close(self):
+        if self.parse_pool:
+            self.parse_pool.shutdown(wait=True, cancel_futures=True)
+            self.parse_pool = None
@@ -1,36 +1,50 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 import os
+import sys
 import json
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.schema.messages import HumanMessage
+from story import Story
 from .base import Transformer
+from .llm import create_llm, invoke, parse_json_response
+from .token_budget import TokenBudget
 
 class ContentTagger(Transformer):
-    def __init__(self):
+    PROMPT_VERSION = 'tags-v1'
+
+    def __init__(self, max_tokens: int = 500):
         load_dotenv()
-        self.llm = ChatOpenAI(
-            model_name="gpt-3.5-turbo",
-            temperature=0,
-        )
+        self.llm = create_llm()
+        # Replaces the fixed 2000-character truncation
+        self.budget = TokenBudget(max_tokens, baseline_chars=2000)
         # Load tags from environment
         tags_str = os.getenv('AVAILABLE_TAGS', '')
         self.available_tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
         self.score_threshold = float(os.getenv('TAG_SCORE_THRESHOLD', '0.6'))
 
-    def transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_tags(self, tags: Any) -> List[Dict[str, Any]]:
+        """Keep only known tags whose score is between the threshold and 1.0"""
+        validated_tags = []
+        for tag in tags if isinstance(tags, list) else []:
+            if isinstance(tag, dict) and 'name' in tag and 'score' in tag:
+                if tag['name'] in self.available_tags and self.score_threshold <= float(tag['score']) <= 1.0:
+                    validated_tags.append({
+                        'name': sys.intern(tag['name']),
+                        'score': float(tag['score'])
+                    })
+        return validated_tags
+
+    def transform(self, data: Story) -> Story:
         """Tag content with relevant technology categories and importance scores"""
         try:
-            if 'content' not in data or not data['content']:
-                data['tags'] = []
+            if not data.content:
+                data.tags = []
                 return data
 
             # Combine title and content for better context
-            analysis_text = f"Title: {data['title']}\n\nContent: {data['content'][:2000]}"
+            content = self.budget.apply(data.content, data.title or '')
+            analysis_text = f"Title: {data.title or ''}\n\nContent: {content}"
 
-            messages = [
-                HumanMessage(
-                    content=f"""Analyze the following text and assign relevant tags from the provided list. 
+            prompt = f"""Analyze the following text and assign relevant tags from the provided list. 
                     For each assigned tag, provide a relevance score between 0.0 and 1.0, where 1.0 means highly relevant.
                     Only include tags with a score >= {self.score_threshold}. Return the result as a JSON array of objects with 'name' and 'score' fields.
                     
@@ -44,35 +58,23 @@ class ContentTagger(Transformer):
                         {{"name": "tag1", "score": 0.9}},
                         {{"name": "tag2", "score": 0.7}}
                     ]"""
-                )
-            ]
-            
-            response = self.llm.invoke(messages)
+
+            response = invoke(self.llm, prompt, self.PROMPT_VERSION)
             
             try:
                 # Extract JSON from response
-                json_str = response.content.strip()
-                if json_str.startswith('```json'):
-                    json_str = json_str[7:-3]  # Remove ```json and ``` markers
-                tags = json.loads(json_str)
-                
-                # Validate tags
-                validated_tags = []
-                for tag in tags:
-                    if isinstance(tag, dict) and 'name' in tag and 'score' in tag:
-                        if tag['name'] in self.available_tags and self.score_threshold <= float(tag['score']) <= 1.0:
-                            validated_tags.append({
-                                'name': tag['name'],
-                                'score': float(tag['score'])
-                            })
-                
-                data['tags'] = validated_tags
+                data.tags = self.validate_tags(parse_json_response(response))
             except json.JSONDecodeError:
-                print(f"Error parsing tags JSON for article: {data.get('title', 'Unknown')}")
-                data['tags'] = []
+                print(f"Error parsing tags JSON for article: {data.title or 'Unknown'}")
+                data.record_error(type(self).__name__, "unparseable tags")
+                data.tags = []
             
             return data
         except Exception as e:
             print(f"Error generating tags: {str(e)}")
-            data['tags'] = []
+            data.record_error(type(self).__name__, e)
+            data.tags = []
             return data
+
+    def report(self):
+        print(self.budget.report(type(self).__name__))
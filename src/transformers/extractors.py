@@ -0,0 +1,183 @@
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urljoin
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+# <title> is its own paragraph, as it was a line of its own in soup.get_text()
+BLOCK_TAGS = HEADING_TAGS | {'p', 'li', 'pre', 'blockquote', 'div', 'section', 'article',
+                             'tr', 'br', 'dd', 'dt', 'figcaption', 'header', 'footer', 'title'}
+SKIP_TAGS = {'script', 'style'}
+
+# Bump when the text or links the extractors produce change, so cached extractions are redone
+EXTRACTION_VERSION = 2
+
+class _Collector:
+    """Builds text and links from start/end/data events in a single pass.
+
+    Text is one paragraph per line with headings marked by a leading '#',
+    links are absolute and deduplicated in document order.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.paragraphs = []
+        self.current = []
+        self.heading = False
+        self.links = {}
+        self.skip_depth = 0
+
+    def _flush(self):
+        paragraph = ' '.join(''.join(self.current).split())
+        if paragraph:
+            self.paragraphs.append(f"# {paragraph}" if self.heading else paragraph)
+        self.current = []
+        self.heading = False
+
+    def start(self, tag: str, attrs: Dict[str, str]):
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == 'a' and attrs.get('href'):
+            # Convert relative URLs to absolute
+            self.links[urljoin(self.base_url, attrs['href'])] = None
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self.heading = tag in HEADING_TAGS
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+    def data(self, text: str):
+        if not self.skip_depth:
+            self.current.append(text)
+
+    def close(self) -> Tuple[str, List[str]]:
+        self._flush()
+        return '\n'.join(self.paragraphs), list(self.links)
+
+def detect_encoding(body: bytes) -> str:
+    """Read the encoding from a <meta charset>, defaulting to UTF-8"""
+    match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', body[:2048], re.IGNORECASE)
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+def decode(body: bytes, encoding: str = None) -> str:
+    """Decode a response body with the given or detected encoding"""
+    try:
+        return body.decode(encoding or detect_encoding(body), errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+def extract_bs4(body: bytes, url: str, encoding: str = None) -> Tuple[str, List[str]]:
+    """BeautifulSoup with the pure-Python html.parser, walking the tree once"""
+    from bs4 import BeautifulSoup, NavigableString, Tag
+    from bs4.element import Comment, Doctype, ProcessingInstruction
+
+    collector = _Collector(url)
+
+    def walk(node):
+        for child in node.children:
+            if isinstance(child, Tag):
+                collector.start(child.name, {key: value for key, value in child.attrs.items() if isinstance(value, str)})
+                walk(child)
+                collector.end(child.name)
+            elif isinstance(child, NavigableString) and not isinstance(child, (Comment, Doctype, ProcessingInstruction)):
+                collector.data(str(child))
+
+    walk(BeautifulSoup(decode(body, encoding), 'html.parser'))
+    return collector.close()
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: _Collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, {key: value for key, value in attrs if value is not None})
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+def extract_html_parser(body: bytes, url: str, encoding: str = None) -> Tuple[str, List[str]]:
+    """Stdlib html.parser events without building a tree"""
+    collector = _Collector(url)
+    parser = _StdlibParser(collector)
+    parser.feed(decode(body, encoding))
+    parser.close()
+    return collector.close()
+
+class _LxmlTarget:
+    def __init__(self, collector: _Collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag, dict(attrib))
+
+    def end(self, tag):
+        self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return self.collector.close()
+
+def extract_lxml(body: bytes, url: str, encoding: str = None) -> Tuple[str, List[str]]:
+    """libxml2's C parser feeding parse events straight into the collector"""
+    from lxml import etree
+
+    collector = _Collector(url)
+    if not body.strip():
+        return collector.close()
+    try:
+        parser = etree.HTMLParser(target=_LxmlTarget(collector), encoding=encoding or detect_encoding(body))
+    except LookupError:
+        parser = etree.HTMLParser(target=_LxmlTarget(collector), encoding='utf-8')
+    return etree.fromstring(body, parser)
+
+def extract_selectolax(body: bytes, url: str, encoding: str = None) -> Tuple[str, List[str]]:
+    """Lexbor (selectolax) parser; paragraphs break at the start of each block element"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    collector = _Collector(url)
+    tree = LexborHTMLParser(decode(body, encoding))
+    root = tree.body or tree.root
+    if root is None:
+        return collector.close()
+    root.strip_tags(list(SKIP_TAGS))
+    for node in root.traverse(include_text=True):
+        if node.tag == '-text':
+            collector.data(node.text_content or '')
+        elif node.tag:
+            collector.start(node.tag, {key: value for key, value in node.attributes.items() if value is not None})
+    return collector.close()
+
+EXTRACTORS: Dict[str, Callable[[bytes, str, str], Tuple[str, List[str]]]] = {
+    'bs4': extract_bs4,
+    'html.parser': extract_html_parser,
+    'lxml': extract_lxml,
+    'selectolax': extract_selectolax,
+}
+
+def get_extractor(name: str) -> Callable[[bytes, str, str], Tuple[str, List[str]]]:
+    """Look up an extraction backend, checking that its parser library is installed"""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}', expected one of: {', '.join(EXTRACTORS)}")
+    modules = {'bs4': 'bs4', 'lxml': 'lxml.etree', 'selectolax': 'selectolax.lexbor'}
+    if name in modules:
+        __import__(modules[name])
+    return EXTRACTORS[name]
+
+def extract(body: bytes, url: str, backend: str = 'bs4', encoding: str = None) -> Tuple[str, List[str]]:
+    """Extract (text, links) from an HTML body with the named backend"""
+    return EXTRACTORS[backend](body, url, encoding)
@@ -0,0 +1,64 @@
+import json
+from typing import Any, Callable
+from langchain_openai import ChatOpenAI
+from langchain.schema.messages import HumanMessage
+from cache.llm import get_llm_cache
+from metrics import get_metrics
+from .rate_limiter import get_rate_limiter
+
+# Completion tokens reserved per request when admitting it against the TPM limit
+COMPLETION_TOKEN_ESTIMATE = 256
+
+def create_llm(model_name: str = "gpt-3.5-turbo", temperature: float = 0) -> ChatOpenAI:
+    """Create the chat model used by the LLM transformers"""
+    return ChatOpenAI(
+        model_name=model_name,
+        temperature=temperature,
+        # Retries are handled by the shared rate limiter
+        max_retries=0,
+    )
+
+def invoke(llm: ChatOpenAI, prompt: str, prompt_version: str, json_mode: bool = False,
+           validate: Callable[[str], bool] = None) -> str:
+    """Send a single-message prompt, serving repeated prompts from the shared LLM cache.
+
+    Bump `prompt_version` whenever a transformer's prompt template changes
+    so stale responses are not reused. `json_mode` asks the model for a
+    single JSON object response. With `validate`, only responses it
+    accepts are cached or served from the cache, so a malformed reply is
+    not replayed on every run.
+    """
+    metrics = get_metrics()
+    cache = get_llm_cache()
+    if cache:
+        cached = cache.get(llm.model_name, prompt_version, prompt)
+        if cached is not None and validate and not validate(cached):
+            cached = None
+        metrics.inc('llm_cache_lookups_total', outcome='hits' if cached is not None else 'misses')
+        if cached is not None:
+            return cached
+
+    model = llm.bind(response_format={"type": "json_object"}) if json_mode else llm
+    with metrics.timer('llm_request'):
+        response = get_rate_limiter().call(
+            lambda: model.invoke([HumanMessage(content=prompt)]),
+            estimate_tokens(prompt) + COMPLETION_TOKEN_ESTIMATE
+        )
+    usage = response.usage_metadata or {}
+    metrics.inc('llm_prompt_tokens_total', usage.get('input_tokens', 0), model=llm.model_name)
+    metrics.inc('llm_completion_tokens_total', usage.get('output_tokens', 0), model=llm.model_name)
+    if cache and (validate is None or validate(response.content)):
+        cache.put(llm.model_name, prompt_version, prompt, response.content)
+    return response.content
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def parse_json_response(text: str) -> Any:
+    """Parse a JSON response, tolerating a surrounding markdown code fence"""
+    json_str = text.strip()
+    if json_str.startswith('```'):
+        json_str = json_str.split('\n', 1)[1] if '\n' in json_str else ''
+        json_str = json_str.rsplit('```', 1)[0]
+    return json.loads(json_str)
@@ -1,29 +1,46 @@
 import os
+import threading
+import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Callable
+from queue import Queue, PriorityQueue, Full
+from typing import List, Dict, Any, Callable, Iterable, Iterator
 from tqdm import tqdm
 from dotenv import load_dotenv
 
 from .base import Transformer
+from story import Story, as_story
+
+class _Done:
+    """Marks the end of a stage's input; sorts after every item in a priority queue"""
+
+    def __lt__(self, other) -> bool:
+        return False
+
+    def __gt__(self, other) -> bool:
+        return True
+
+_DONE = _Done()
+# Queue entries are (priority, input index, item)
+_END = (_DONE, -1, _DONE)
 
 class TransformerPipeline:
     def __init__(self, transformers: List[Transformer]):
         self.transformers = transformers
         load_dotenv()
         self.max_workers = int(os.getenv('MAX_WORKER_THREADS', '4'))
+        self.queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
 
-    def transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def transform(self, data: Dict[str, Any]) -> Story:
         """Apply all transformations in sequence"""
-        result = data
+        result = as_story(data)
         for transformer in self.transformers:
-            result = transformer.transform(result)
+            # Custom transformers may still build and return plain dicts
+            result = as_story(transformer.transform(result))
         return result
 
-    def process(self, item: Dict[str, Any]) -> Dict[str, Any]:
+    def process(self, item: Dict[str, Any]) -> Story:
         """Process a single item through all transformers in sequence"""
-        for transformer in self.transformers:
-            item = transformer.transform(item)
-        return item
+        return self.transform(item)
 
     def process_parallel(self, items: List[Dict[str, Any]], post_process_fn: Callable = None) -> List[Dict[str, Any]]:
         """Process multiple items in parallel with progress bar"""
@@ -58,3 +75,118 @@ class TransformerPipeline:
                         pbar.update(1)
 
         return results
+
+    def stream(self, items: Iterable[Dict[str, Any]],
+               priority: Callable[[Story], Any] = None,
+               on_drop: Callable[[int], None] = None) -> Iterator[tuple[int, Story]]:
+        """Run items through per-transformer stages joined by bounded queues.
+
+        Each transformer is a stage with `transformer.workers` threads, so
+        fetch I/O and LLM calls overlap across items. Items are pulled from
+        `items` lazily, and a full queue blocks the stage feeding it.
+        Dict items and results are converted to Story records on the way.
+        Yields (input index, result) pairs in completion order. Closing the
+        generator early stops the feed and discards items still in flight.
+
+        With `priority`, every stage takes the waiting item with the lowest
+        `priority(item)` first instead of the oldest, and `items` is read
+        ahead without bound so the order covers everything fetched so far.
+
+        An item whose transformer raises is dropped; `on_drop` is called
+        with its input index from the worker thread.
+        """
+        if priority:
+            queues = [PriorityQueue()] + [PriorityQueue(maxsize=self.queue_size) for _ in self.transformers]
+        else:
+            queues = [Queue(maxsize=self.queue_size) for _ in range(len(self.transformers) + 1)]
+        rank = priority or (lambda item: 0)
+        stopped = threading.Event()
+
+        def put(queue: Queue, entry) -> bool:
+            # Give up once stopped, since nothing may be draining the queue anymore
+            while not stopped.is_set():
+                try:
+                    queue.put(entry, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def feed():
+            try:
+                for index, item in enumerate(items):
+                    item = as_story(item)
+                    if not put(queues[0], (rank(item), index, item)):
+                        break
+            except Exception as e:
+                print(f"Error reading pipeline input: {str(e)}")
+                print("Traceback:")
+                traceback.print_exc()
+            finally:
+                # Let an abandoned generator release its resources now rather than when collected
+                if stopped.is_set() and hasattr(items, 'close'):
+                    items.close()
+                queues[0].put(_END)
+
+        def start_stage(stage: int, transformer: Transformer):
+            inbox, outbox = queues[stage], queues[stage + 1]
+            workers = max(1, int(getattr(transformer, 'workers', 1)))
+            remaining = [workers]
+            lock = threading.Lock()
+
+            def work():
+                while True:
+                    _, index, item = inbox.get()
+                    if item is _DONE:
+                        # Let sibling workers see the marker, the last one forwards it
+                        inbox.put(_END)
+                        with lock:
+                            remaining[0] -= 1
+                            last = remaining[0] == 0
+                        if last and outbox is queues[-1]:
+                            # Nobody drains the results once the consumer has stopped
+                            put(outbox, _END)
+                        elif last:
+                            outbox.put(_END)
+                        return
+                    if stopped.is_set():
+                        continue
+                    try:
+                        # Custom transformers may still build and return plain dicts
+                        result = as_story(transformer.transform(item))
+                        put(outbox, (rank(result), index, result))
+                    except Exception as e:
+                        print(f"Error in {type(transformer).__name__} for {item.get('title', 'Unknown')}: {str(e)}")
+                        if on_drop:
+                            on_drop(index)
+
+            for i in range(workers):
+                threading.Thread(target=work, name=f"{type(transformer).__name__}-{i}", daemon=True).start()
+
+        for stage, transformer in enumerate(self.transformers):
+            start_stage(stage, transformer)
+        threading.Thread(target=feed, name="pipeline-feed", daemon=True).start()
+
+        results = queues[-1]
+        try:
+            while True:
+                _, index, result = results.get()
+                if result is _DONE:
+                    return
+                yield index, result
+        finally:
+            stopped.set()
+
+    def process_stream(self, items: Iterable[Dict[str, Any]], post_process_fn: Callable = None) -> List[Story]:
+        """Process a stream of items through the staged pipeline, keeping input order"""
+        results = []
+        with tqdm(desc="Processing stories") as pbar:
+            for index, result in self.stream(items):
+                if post_process_fn:
+                    result = post_process_fn(result)
+                results.append((index, result))
+                pbar.set_postfix_str(f"Processed: {result.get('title', '')[:30]}...")
+                pbar.update(1)
+
+        results.sort(key=lambda entry: entry[0])
+        return [result for _, result in results]
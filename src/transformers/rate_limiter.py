@@ -0,0 +1,157 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+from dotenv import load_dotenv
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        """Block until `amount` tokens are available, then take them"""
+        # A single request larger than the bucket could otherwise never run
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ConcurrencyGovernor:
+    """Concurrency limit adapted AIMD-style: +1 per window of successes, halved on throttling"""
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = None):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.condition.notify_all()
+
+    def on_throttle(self):
+        with self.condition:
+            self.limit = max(self.minimum, self.limit / 2)
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None and getattr(error, 'response', None) is not None:
+        status = getattr(error.response, 'status_code', None)
+    return status
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the server's requested delay from a throttled response, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return None
+
+class RateLimiter:
+    """Process-wide limiter for OpenAI calls.
+
+    Requests are admitted against requests-per-minute and tokens-per-minute
+    buckets and an adaptive concurrency limit. Throttled (429) and transient
+    server errors are retried with jittered exponential backoff, honoring
+    Retry-After when the server sends it.
+    """
+
+    def __init__(self, requests_per_minute: float = 3500, tokens_per_minute: float = 90000,
+                 max_concurrency: int = 8, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.governor = ConcurrencyGovernor(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {'calls': 0, 'throttled': 0, 'retries': 0}
+        self.lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def call(self, fn: Callable[[], Any], estimated_tokens: int) -> Any:
+        """Run `fn` once admitted, retrying throttled and transient failures"""
+        for attempt in range(self.max_retries + 1):
+            self.requests.acquire(1)
+            self.tokens.acquire(estimated_tokens)
+            self.governor.acquire()
+            try:
+                self._count('calls')
+                result = fn()
+                self.governor.on_success()
+                return result
+            except Exception as e:
+                status = _status_code(e)
+                throttled = status == 429
+                transient = status is not None and status >= 500
+                if not (throttled or transient) or attempt == self.max_retries:
+                    raise
+                if throttled:
+                    self._count('throttled')
+                    self.governor.on_throttle()
+                delay = _retry_after(e)
+            finally:
+                self.governor.release()
+
+            # Full jitter keeps concurrent workers from retrying in lockstep
+            if delay is None:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            self._count('retries')
+            time.sleep(delay)
+
+    def report(self) -> str:
+        """Summarize throttling for the run"""
+        return (f"OpenAI rate limiter: {self.stats['calls']} calls, {self.stats['throttled']} throttled, "
+                f"{self.stats['retries']} retries, concurrency limit {int(self.governor.limit)}")
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the limiter shared by every LLM transformer in the process"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            load_dotenv()
+            _limiter = RateLimiter(
+                requests_per_minute=float(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '3500')),
+                tokens_per_minute=float(os.getenv('OPENAI_TOKENS_PER_MINUTE', '90000')),
+                max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', '8')),
+                max_retries=int(os.getenv('OPENAI_MAX_RETRIES', '5'))
+            )
+        return _limiter
@@ -0,0 +1,54 @@
+from story import Story
+from .content_tagger import ContentTagger
+from .llm import invoke, parse_json_response
+from .token_budget import TokenBudget
+
+class SummarizerTagger(ContentTagger):
+    """Summarize and tag content with a single structured LLM call.
+
+    Replaces a `summarizer` + `content_tagger` pair so the article content
+    is sent once; tags go through the same validation as ContentTagger.
+    """
+    PROMPT_VERSION = 'summary-tags-v1'
+
+    def __init__(self, max_tokens: int = 1000):
+        super().__init__(max_tokens=max_tokens)
+        # Measured against the summarizer's input, the larger of the two it replaces
+        self.budget = TokenBudget(max_tokens, baseline_chars=4000)
+
+    def transform(self, data: Story) -> Story:
+        """Summarize content and tag it with relevant technology categories"""
+        try:
+            if not data.content:
+                data.summary = "No content available to summarize"
+                data.tags = []
+                return data
+
+            content = self.budget.apply(data.content, data.title or '')
+            prompt = f"""Analyze the following text. Provide a concise summary of it in 2-3 sentences, and assign relevant tags from the provided list.
+For each assigned tag, provide a relevance score between 0.0 and 1.0, where 1.0 means highly relevant.
+Only include tags with a score >= {self.score_threshold}.
+
+Available tags: {', '.join(self.available_tags)}
+
+Title: {data.title or ''}
+
+Text to analyze:
+{content}
+
+Return a JSON object in this format:
+{{"summary": "...", "tags": [{{"name": "tag1", "score": 0.9}}, {{"name": "tag2", "score": 0.7}}]}}"""
+
+            result = parse_json_response(invoke(self.llm, prompt, self.PROMPT_VERSION, json_mode=True))
+            if not isinstance(result, dict) or not result.get('summary'):
+                raise ValueError("response has no summary")
+
+            data.summary = str(result['summary']).strip()
+            data.tags = self.validate_tags(result.get('tags'))
+            return data
+        except Exception as e:
+            print(f"Error generating summary and tags: {str(e)}")
+            data.record_error(type(self).__name__, e)
+            data.summary = f"Error generating summary: {str(e)}"
+            data.tags = []
+            return data
@@ -1,31 +1,25 @@
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain.schema.messages import HumanMessage
+from story import Story
 from .base import Transformer
+from .llm import create_llm, invoke
 
 class ContentSummarizer(Transformer):
+    PROMPT_VERSION = 'summary-v1'
+
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model_name="gpt-3.5-turbo",
-            temperature=0,
-        )
+        self.llm = create_llm()
 
-    def transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def transform(self, data: Story) -> Story:
         """Summarize content using OpenAI"""
         try:
-            if 'content' not in data:
-                data['summary'] = "No content available to summarize"
+            if data.content is None:
+                data.summary = "No content available to summarize"
                 return data
 
-            messages = [
-                HumanMessage(
-                    content=f"Please provide a concise summary of the following text in 2-3 sentences:\n\n{data['content']}"
-                )
-            ]
-            
-            response = self.llm.invoke(messages)
-            data['summary'] = response.content
+            prompt = f"Please provide a concise summary of the following text in 2-3 sentences:\n\n{data.content}"
+
+            data.summary = invoke(self.llm, prompt, self.PROMPT_VERSION)
             return data
         except Exception as e:
-            data['summary'] = f"Error generating summary: {str(e)}"
+            data.record_error(type(self).__name__, e)
+            data.summary = f"Error generating summary: {str(e)}"
             return data
@@ -0,0 +1,98 @@
+import re
+import threading
+from typing import List, Set
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional, fall back to an estimate
+    _encoding = None
+
+# Paragraphs this short are usually navigation, bylines or buttons
+MIN_PARAGRAPH_WORDS = 6
+LEAD_PARAGRAPHS = 3
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate them"""
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def _words(text: str) -> Set[str]:
+    return {word for word in re.findall(r'\w+', text.lower()) if len(word) > 3}
+
+def select_paragraphs(text: str, max_tokens: int, title: str = '') -> str:
+    """Pick the most informative paragraphs of `text` that fit in `max_tokens`.
+
+    Paragraphs are newline-separated, with headings marked by a leading '#'.
+    The lead, headings and the paragraphs right after them, and paragraphs
+    sharing words with the title are preferred; the selection keeps the
+    original order.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    paragraphs = [p for p in text.split('\n') if p.strip()]
+    title_words = _words(title)
+    scored = []
+    after_heading = False
+    for position, paragraph in enumerate(paragraphs):
+        is_heading = paragraph.startswith('#')
+        score = 0.0
+        if position < LEAD_PARAGRAPHS:
+            score += 3 - position
+        if is_heading:
+            score += 1.5
+        elif after_heading:
+            score += 2
+        if title_words:
+            score += 3 * len(title_words & _words(paragraph)) / len(title_words)
+        if not is_heading and len(paragraph.split()) < MIN_PARAGRAPH_WORDS:
+            score -= 2
+        # Earlier paragraphs win ties
+        score -= position * 0.001
+        scored.append((score, position, paragraph))
+        after_heading = is_heading
+
+    selected = []
+    remaining = max_tokens
+    for score, position, paragraph in sorted(scored, reverse=True):
+        tokens = count_tokens(paragraph)
+        if tokens <= remaining:
+            selected.append((position, paragraph))
+            remaining -= tokens
+        if remaining <= 0:
+            break
+
+    if not selected:
+        # A single huge paragraph: fall back to cutting the lead
+        return text[:max_tokens * 4]
+    return '\n'.join(paragraph for _, paragraph in sorted(selected))
+
+class TokenBudget:
+    """Token budget for the content one transformer sends, with savings stats.
+
+    Savings are measured against the fixed character truncation
+    (`baseline_chars`) the transformer used before.
+    """
+
+    def __init__(self, max_tokens: int, baseline_chars: int):
+        self.max_tokens = max_tokens
+        self.baseline_chars = baseline_chars
+        self.stats = {'items': 0, 'tokens': 0, 'baseline_tokens': 0}
+        self.lock = threading.Lock()
+
+    def apply(self, text: str, title: str = '') -> str:
+        selected = select_paragraphs(text, self.max_tokens, title)
+        tokens = count_tokens(selected)
+        baseline_tokens = count_tokens(' '.join(text.split('\n'))[:self.baseline_chars])
+        with self.lock:
+            self.stats['items'] += 1
+            self.stats['tokens'] += tokens
+            self.stats['baseline_tokens'] += baseline_tokens
+        return selected
+
+    def report(self, name: str) -> str:
+        saved = self.stats['baseline_tokens'] - self.stats['tokens']
+        return (f"{name} token budget: {self.stats['tokens']} tokens sent for {self.stats['items']} items, "
+                f"{saved} saved vs {self.baseline_chars}-char truncation")
@@ -0,0 +1,153 @@
+import os
+import argparse
+import socket
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from elasticsearch_dsl.connections import connections
+
+from transformers.pipeline import TransformerPipeline
+from repository import ArticleWriter
+from config import Config, ConfigurationError
+from cache.llm import configure_llm_cache
+from metrics import get_metrics, instrument
+from tracing import configure_tracing
+from leases import get_lease_store, make_shards
+from backfill import backfill
+from main import report
+
+class LeaseLost(Exception):
+    """The shard's lease expired and another worker took it over"""
+
+class Heartbeat:
+    """Renews a lease in the background until stopped, noting if it was lost.
+
+    The lease counts as lost when it was reassigned, or when renewals kept
+    failing until it expired, since another worker may claim it from then on.
+    """
+
+    def __init__(self, store, lease, lease_seconds: float):
+        self.store = store
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        # renew() advances lease['expires_at'] before writing it, so track the last confirmed expiry
+        self.expires_at = lease['expires_at']
+        self.lost = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"lease-{lease['shard']}", daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            try:
+                if not self.store.renew(self.lease, self.lease_seconds):
+                    self.lost.set()
+                    return
+                self.expires_at = self.lease['expires_at']
+            except Exception as e:
+                # A missed renewal is survivable while the lease has time left
+                print(f"Error renewing lease {self.lease['shard']}: {str(e)}")
+                if time.time() >= self.expires_at:
+                    print(f"Lease {self.lease['shard']} expired without a renewal")
+                    self.lost.set()
+                    return
+
+    def check(self):
+        if self.lost.is_set():
+            raise LeaseLost(self.lease['shard'])
+
+    def __enter__(self) -> 'Heartbeat':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Hackerman: sharded backfill worker')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to YAML configuration file')
+    parser.add_argument('--leases', type=str, default=os.getenv('LEASE_STORE', '.cache/leases.sqlite'),
+                        help="Lease table: a SQLite path for one host, or 'elasticsearch' to share it across hosts")
+    parser.add_argument('--worker-id', type=str, default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument('--from-id', type=int, help='Highest item id to start from (default: maxitem)')
+    parser.add_argument('--to-id', type=int, help='Lowest item id to walk down to (default: 1)')
+    parser.add_argument('--since', type=datetime.fromisoformat, help='Oldest posting date to include, e.g. 2024-01-01')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='Posting date to start before, e.g. 2024-04-01')
+    parser.add_argument('--shard-size', type=int, default=int(os.getenv('SHARD_SIZE', '10000')),
+                        help='Item ids per shard')
+    parser.add_argument('--lease-seconds', type=float, default=float(os.getenv('LEASE_SECONDS', '300')),
+                        help='How long a claimed shard stays reserved without a renewal')
+    parser.add_argument('--window', type=int, default=int(os.getenv('BACKFILL_WINDOW', '500')),
+                        help='Stories per Elasticsearch bulk write; bounds memory use')
+    parser.add_argument('--batch-size', type=int, help='Item ids fetched per batch (default: 4x the source workers)')
+    parser.add_argument('--reprocess-after-hours', type=float, default=float(os.getenv('BACKFILL_REPROCESS_AFTER_HOURS', '87600')),
+                        help='Only refresh the stats of stories indexed more recently than this')
+    parser.add_argument('--no-llm-cache', action='store_true', help='Bypass the LLM result cache')
+    parser.add_argument('--metrics-textfile', type=str, default=os.getenv('METRICS_TEXTFILE', 'metrics/hackerman.prom'),
+                        help='Prometheus textfile to write run metrics to')
+    parser.add_argument('--metrics-json', type=str, default=os.getenv('METRICS_JSON', 'metrics/hackerman.json'),
+                        help='JSON file to write the run metrics summary to')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace of the run to this file (open in Perfetto)')
+    args = parser.parse_args()
+
+    configure_llm_cache(enabled=not args.no_llm_cache)
+    configure_tracing(enabled=bool(args.trace))
+
+    source, transformers, _, _ = Config.from_yaml(args.config)
+    if not hasattr(source, 'stream_backfill'):
+        raise ConfigurationError(f"{type(source).__name__} does not support backfilling")
+
+    connections.create_connection(hosts=[os.getenv('ELASTICSEARCH_HOST', 'localhost:9200')])
+
+    for transformer in transformers:
+        instrument(transformer, 'transform')
+    writer = ArticleWriter(chunk_size=int(os.getenv('ES_BULK_CHUNK_SIZE', '500')))
+    instrument(writer, 'write', 'elasticsearch_write')
+    instrument(writer, 'refresh_stats', 'elasticsearch_refresh')
+    pipeline = TransformerPipeline(transformers)
+
+    # Every worker registers the same aligned shards; ones that already exist keep their state
+    store = get_lease_store(args.leases)
+    start_id, stop_id = source.resolve_range(args.from_id, args.to_id, args.since, args.until)
+    store.create(make_shards(start_id, stop_id, args.shard_size))
+
+    metrics = get_metrics()
+    while True:
+        lease = store.claim(args.worker_id, args.lease_seconds)
+        if lease is None:
+            counts = store.counts()
+            if not counts['leased']:
+                print(f"No shards left ({counts['done']} done)")
+                break
+            # Other workers hold the rest; wait in case one of them dies and its lease expires
+            time.sleep(min(30, args.lease_seconds / 3))
+            continue
+
+        print(f"[{args.worker_id}] Claimed shard {lease['shard']}: ids {lease['high']}..{lease['low']} "
+              f"(attempt {lease['attempt']})")
+        try:
+            with Heartbeat(store, lease, args.lease_seconds) as heartbeat:
+                # Dates were resolved to ids when the shards were made; they only trim the edges here
+                backfill(source, pipeline, writer, window=args.window,
+                         reprocess_after_hours=args.reprocess_after_hours, on_window=heartbeat.check,
+                         stop=heartbeat.lost,
+                         start_id=lease['high'], stop_id=lease['low'], since=args.since, until=args.until,
+                         batch_size=args.batch_size)
+                heartbeat.check()
+            if store.complete(lease):
+                metrics.inc('shards_completed_total')
+            else:
+                raise LeaseLost(lease['shard'])
+        except LeaseLost:
+            # Everything written so far was an idempotent upsert, so the new owner can redo it safely
+            print(f"[{args.worker_id}] Lost the lease on shard {lease['shard']}, moving on")
+            metrics.inc('shards_lost_total')
+        metrics.write(textfile=args.metrics_textfile, json_path=args.metrics_json)
+
+    report(transformers, args)
+
+if __name__ == "__main__":
+    main()